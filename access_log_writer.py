@@ -0,0 +1,190 @@
+import sqlite3
+import threading
+import atexit
+from collections import deque
+from datetime import datetime, timezone
+from db_connections import connect
+
+def utc_timestamp(seconds=None):
+    """UTC time (now, or the given epoch seconds) in SQLite's CURRENT_TIMESTAMP format"""
+    moment = datetime.now(timezone.utc) if seconds is None else datetime.fromtimestamp(seconds, timezone.utc)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+class AccessLogWriter:
+    """Write-behind access log: events are queued and written in batches.
+
+    log() only appends to a bounded in-memory queue; a background thread
+    writes everything queued in one transaction at most every
+    flush_interval seconds (sooner once batch_size events are waiting).
+    When the queue is full the overflow policy decides what happens:
+        'drop_oldest'  discard the oldest queued event (default)
+        'drop_newest'  discard the event being logged
+        'block'        wait for the writer to make room
+    Pending events are flushed by close(), which also runs at exit.
+    end_visit() queues an update of a visit row logged earlier with a
+    visit_id; it is written after the inserts of the same batch.
+    """
+
+    OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+    def __init__(self, db_path, max_queue=10000, batch_size=500, flush_interval=0.5,
+                 overflow='drop_oldest'):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {self.OVERFLOW_POLICIES}")
+
+        self.db_path = db_path
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._pending = deque()
+        self._in_flight = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="AccessLogWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, user_id, access_granted, access_time=None, visit_end=None,
+            confidence=None, sightings=1, visit_id=None):
+        """Queue one access event, returns False if it was dropped"""
+        return self._queue(('insert', (user_id, bool(access_granted), access_time or utc_timestamp(),
+                                       visit_end, confidence, sightings, visit_id)))
+
+    def end_visit(self, visit_id, visit_end, confidence, sightings, user_id=None, access_granted=False,
+                  access_time=None):
+        """Queue the final visit_end, confidence and sightings of a logged visit.
+
+        access_time is the visit start, used to log the whole visit if its
+        start event never reached the database (e.g. dropped on overflow).
+        """
+        return self._queue(('end_visit', (visit_id, visit_end, confidence, sightings,
+                                          user_id, bool(access_granted), access_time)))
+
+    def _queue(self, event):
+        with self._cond:
+            if self._closed:
+                self.dropped += 1
+                return False
+
+            if len(self._pending) >= self.max_queue:
+                if self.overflow == 'drop_newest':
+                    self.dropped += 1
+                    return False
+                elif self.overflow == 'drop_oldest':
+                    self._pending.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self._pending) >= self.max_queue and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        self.dropped += 1
+                        return False
+
+            self._pending.append(event)
+            self.queued += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def _run(self):
+        """Writer thread: drain the queue in batched transactions"""
+        conn = connect(self.db_path)
+
+        while True:
+            with self._cond:
+                if len(self._pending) < self.batch_size and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                if not self._pending:
+                    if self._closed:
+                        break
+                    continue
+
+                count = min(self.batch_size, len(self._pending))
+                batch = [self._pending.popleft() for _ in range(count)]
+                self._in_flight = count
+                self._cond.notify_all()  # Room for blocked producers
+
+            try:
+                self._write_batch(conn, batch)
+                written, failed = len(batch), 0
+            except sqlite3.Error as e:
+                print(f"Error writing access logs: {str(e)}")
+                written, failed = 0, len(batch)
+
+            with self._cond:
+                self._in_flight = 0
+                self.written += written
+                self.failed += failed
+                self._cond.notify_all()  # Wake flush()
+
+        conn.close()
+
+    def _write_batch(self, conn, batch):
+        """Insert a batch of events, end visits and update last_access in one transaction"""
+        inserts = [values for kind, values in batch if kind == 'insert']
+        visit_ends = [values for kind, values in batch if kind == 'end_visit']
+
+        last_access = {}
+        for user_id, access_granted, access_time, visit_end, _, _, _ in inserts:
+            if access_granted:
+                seen = visit_end or access_time
+                last_access[user_id] = max(seen, last_access.get(user_id, seen))
+        for _, visit_end, _, _, user_id, access_granted, _ in visit_ends:
+            if access_granted:
+                last_access[user_id] = max(visit_end, last_access.get(user_id, visit_end))
+
+        with conn:
+            conn.executemany('''
+                INSERT INTO access_logs (user_id, access_granted, access_time, visit_end, confidence, sightings,
+                                         visit_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', inserts)
+            # A visit's insert is always queued before its end, so it is in this batch or an earlier one
+            for visit_id, visit_end, confidence, sightings, user_id, access_granted, access_time in visit_ends:
+                updated = conn.execute('''
+                    UPDATE access_logs SET visit_end = ?, confidence = ?, sightings = ? WHERE visit_id = ?
+                ''', (visit_end, confidence, sightings, visit_id)).rowcount
+                if not updated:
+                    # Its insert was dropped on overflow: log the whole visit rather than lose it
+                    conn.execute('''
+                        INSERT INTO access_logs (user_id, access_granted, access_time, visit_end, confidence,
+                                                 sightings, visit_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (user_id, access_granted, access_time or visit_end, visit_end, confidence, sightings,
+                          visit_id))
+            conn.executemany('''
+                UPDATE users SET last_access = ? WHERE user_id = ?
+            ''', [(access_time, user_id) for user_id, access_time in last_access.items()])
+
+    def flush(self, timeout=None):
+        """Wait until every queued event has been written, returns False on timeout"""
+        with self._cond:
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def close(self, timeout=10):
+        """Stop accepting events, flush what is queued and stop the writer"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        """Return the queued/written/dropped/failed counters and the queue depth"""
+        with self._cond:
+            return {
+                'queued': self.queued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'pending': len(self._pending) + self._in_flight,
+            }
@@ -0,0 +1,133 @@
+import time
+from collections import deque
+import cv2
+import face_recognition
+from face_tracker import box_iou
+from metrics import Metrics
+
+class AdaptiveDetector:
+    """Face detection stage that adapts its resolution and search region.
+
+    While faces are being tracked, only a region of interest around each
+    last known box is searched, each at the downscale that brings that face
+    to about target_face_size pixels. Every full_scan_interval frames (or as
+    soon as a tracked face is lost) the whole frame is scanned again, at a
+    scale chosen from the smallest recent face; with nothing in view, every
+    far_scan_every-th full scan uses far_scale to catch distant faces.
+
+    Boxes are returned as (top, right, bottom, left) in full-frame pixels.
+    """
+
+    def __init__(self, detect_fn=None, scale=0.25, min_scale=0.125, max_scale=1.0,
+                 far_scale=0.5, target_face_size=80, roi_margin=0.75,
+                 full_scan_interval=15, far_scan_every=4, metrics=None):
+        self.detect_fn = detect_fn or face_recognition.face_locations
+        self.metrics = metrics or Metrics()
+        self.scale = scale
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.far_scale = far_scale
+        self.target_face_size = target_face_size
+        self.roi_margin = roi_margin
+        self.full_scan_interval = full_scan_interval
+        self.far_scan_every = far_scan_every
+
+        self.face_sizes = deque(maxlen=30)
+        self._frames_since_full = 0
+        self._idle_full_scans = 0
+
+        # Detection time statistics
+        self.frames = 0
+        self.full_scans = 0
+        self.roi_scans = 0
+        self.detect_time = 0.0
+        self.baseline_time = None  # Moving average of a default full-frame scan
+        self.saved_time = 0.0
+
+    def _scale_for(self, face_size):
+        """Downscale that brings a face of face_size pixels to target_face_size"""
+        return min(self.max_scale, max(self.min_scale, self.target_face_size / float(face_size)))
+
+    def _detect_region(self, frame, region, scale):
+        """Detect faces in region = (top, right, bottom, left) of frame at scale"""
+        top, right, bottom, left = region
+        crop = frame[top:bottom, left:right]
+        if crop.size == 0:
+            return []
+        with self.metrics.stage('resize_convert'):
+            if scale != 1.0:
+                crop = cv2.resize(crop, (0, 0), None, scale, scale)
+            crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+
+        with self.metrics.stage('detect'):
+            found = self.detect_fn(crop)
+        return [(round(t / scale) + top, round(r / scale) + left, round(b / scale) + top, round(l / scale) + left)
+                for t, r, b, l in found]
+
+    def _roi(self, box, frame_shape):
+        """The box grown by roi_margin of its size on every side, clipped to the frame"""
+        top, right, bottom, left = box
+        margin_y = int((bottom - top) * self.roi_margin)
+        margin_x = int((right - left) * self.roi_margin)
+        return (max(0, top - margin_y), min(frame_shape[1], right + margin_x),
+                min(frame_shape[0], bottom + margin_y), max(0, left - margin_x))
+
+    def _full_scan_scale(self):
+        if self.face_sizes:
+            # Scale for the smallest (farthest) recent face
+            return self._scale_for(min(self.face_sizes))
+        self._idle_full_scans += 1
+        if self.far_scan_every and self._idle_full_scans % self.far_scan_every == 0:
+            return self.far_scale
+        return self.scale
+
+    def detect(self, frame, hints=()):
+        """Return the face boxes in a BGR frame, given the last known boxes as hints"""
+        start = time.perf_counter()
+        self.frames += 1
+
+        if not hints or self._frames_since_full >= self.full_scan_interval:
+            scale = self._full_scan_scale()
+            height, width = frame.shape[:2]
+            boxes = self._detect_region(frame, (0, width, height, 0), scale)
+            self._frames_since_full = 0
+            self.full_scans += 1
+            if not boxes:
+                self.face_sizes.clear()
+        else:
+            scale = None
+            boxes = []
+            for hint in hints:
+                roi = self._roi(hint, frame.shape)
+                for box in self._detect_region(frame, roi, self._scale_for(hint[2] - hint[0])):
+                    # Neighbouring regions can find the same face twice
+                    if all(box_iou(box, found) < 0.5 for found in boxes):
+                        boxes.append(box)
+            self._frames_since_full += 1
+            self.roi_scans += 1
+
+            # A tracked face was not found near its last position: rescan everything next frame
+            if len(boxes) < len(hints):
+                self._frames_since_full = self.full_scan_interval
+
+        for top, right, bottom, left in boxes:
+            self.face_sizes.append(bottom - top)
+
+        elapsed = time.perf_counter() - start
+        self.detect_time += elapsed
+        if scale == self.scale:
+            self.baseline_time = elapsed if self.baseline_time is None else 0.9 * self.baseline_time + 0.1 * elapsed
+        if self.baseline_time is not None:
+            self.saved_time += self.baseline_time - elapsed
+
+        return boxes
+
+    def stats(self):
+        """Return scan counts and the detection time spent and saved, in seconds"""
+        return {
+            'frames': self.frames,
+            'full_scans': self.full_scans,
+            'roi_scans': self.roi_scans,
+            'detect_time': self.detect_time,
+            'saved_time': self.saved_time,
+        }
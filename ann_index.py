@@ -0,0 +1,90 @@
+import numpy as np
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index in pure NumPy.
+
+    Rows are clustered with k-means into n_lists cells. A query only looks at
+    the rows of its n_probe nearest cells, and those candidates are re-ranked
+    with exact distances, so the returned distances are always exact; only
+    recall is approximate.
+    """
+
+    def __init__(self, matrix, norms=None, n_lists=None, n_probe=8,
+                 train_size=50000, iterations=10, seed=0):
+        self.matrix = matrix
+        self.norms = norms if norms is not None else np.einsum('ij,ij->i', matrix, matrix)
+        self.n_probe = n_probe
+
+        size = len(matrix)
+        self.n_lists = max(1, min(n_lists or int(4 * np.sqrt(size)), size))
+        self.centroids = self._train(train_size, iterations, np.random.default_rng(seed))
+
+        # Store rows grouped by cell: cell c owns order[offsets[c]:offsets[c + 1]]
+        assignments = self._assign(matrix)
+        self.order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def _assign(self, rows, batch_size=65536):
+        """Return the nearest centroid of each row"""
+        centroid_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        assignments = np.empty(len(rows), dtype=np.int64)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            # |x|^2 is the same for every centroid, so it can be left out
+            scores = centroid_norms[None, :] - 2.0 * (batch @ self.centroids.T)
+            assignments[start:start + batch_size] = np.argmin(scores, axis=1)
+        return assignments
+
+    def _train(self, train_size, iterations, rng):
+        """Run k-means on a random sample of the rows"""
+        size = len(self.matrix)
+        sample = self.matrix[rng.choice(size, min(train_size, size), replace=False)]
+        self.centroids = sample[rng.choice(len(sample), self.n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = self._assign(sample)
+            counts = np.bincount(assignments, minlength=self.n_lists)
+
+            # Sum the members of each cell in one pass over the sorted sample
+            order = np.argsort(assignments, kind='stable')
+            filled = counts > 0
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+
+            # Empty cells keep their previous centroid
+            self.centroids[filled] = sums / counts[filled, None]
+
+        return self.centroids
+
+    def search(self, queries, k=1, n_probe=None):
+        """Return (indices, distances) of shape (queries, k), sorted by distance.
+
+        Slots without a candidate are padded with index -1 and distance inf.
+        """
+        queries = np.asarray(queries, dtype=self.matrix.dtype).reshape(-1, self.matrix.shape[1])
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+
+        centroid_scores = (np.einsum('ij,ij->i', self.centroids, self.centroids)[None, :]
+                           - 2.0 * (queries @ self.centroids.T))
+        if n_probe < self.n_lists:
+            probes = np.argpartition(centroid_scores, n_probe - 1, axis=1)[:, :n_probe]
+        else:
+            probes = np.broadcast_to(np.arange(self.n_lists), centroid_scores.shape)
+
+        for q, (query, cells) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+            if len(candidates) == 0:
+                continue
+
+            # Exact re-ranking of the candidates
+            sq = self.norms[candidates] + query @ query - 2.0 * (self.matrix[candidates] @ query)
+            found = min(k, len(candidates))
+            top = np.argpartition(sq, found - 1)[:found] if found < len(candidates) else np.arange(found)
+            top = top[np.argsort(sq[top])]
+            indices[q, :found] = candidates[top]
+            distances[q, :found] = np.sqrt(np.maximum(sq[top], 0.0))
+
+        return indices, distances
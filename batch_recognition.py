@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import argparse
+from multiprocessing import Pool
+import cv2
+import face_recognition
+from gallery import Gallery
+from gallery_store import open_gallery
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Per-process recognizer state, set up once by init_worker
+_worker = {}
+
+def init_worker(gallery_path, detector, scale, tolerance, confidence_threshold):
+    """Pool initializer: map the gallery and create the detector once per process"""
+    from run_face_recognition import create_detector_backend
+
+    # run_batch checked the gallery opens before starting the pool
+    gallery_file = open_gallery(gallery_path)
+    _worker.update(
+        gallery=Gallery(gallery_file.encodings, gallery_file.ids),
+        detector=create_detector_backend(detector),
+        scale=scale,
+        tolerance=tolerance,
+        confidence_threshold=confidence_threshold,
+    )
+
+def recognize_frame(frame):
+    """Detect, encode and match the faces of one BGR frame"""
+    scale = _worker['scale']
+    small = cv2.cvtColor(cv2.resize(frame, (0, 0), None, scale, scale), cv2.COLOR_BGR2RGB)
+    boxes = [(round(t / scale), round(r / scale), round(b / scale), round(l / scale))
+             for t, r, b, l in _worker['detector'].detect(small)]
+    if not boxes:
+        return []
+
+    encodings = face_recognition.face_encodings(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), boxes)
+    faces = []
+    for box, candidates in zip(boxes, _worker['gallery'].match(encodings)):
+        user_id, distance = candidates[0] if candidates else (None, None)
+        if distance is not None and (distance > _worker['tolerance']
+                                     or 1 - distance <= _worker['confidence_threshold']):
+            user_id = None  # Closest match is not close enough
+        faces.append({'box': list(box), 'user_id': user_id, 'distance': distance})
+    return faces
+
+def process_task(task):
+    """Run one task, returns its list of result records"""
+    kind, path, start, end, every = task
+
+    if kind == 'image':
+        frame = cv2.imread(path)
+        if frame is None:
+            return [{'source': path, 'frame': 0, 'error': "Could not read image"}]
+        return [{'source': path, 'frame': 0, 'faces': recognize_frame(frame)}]
+
+    # A segment [start, end) of a video, recognizing only every Nth frame
+    cap = cv2.VideoCapture(path)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    records = []
+    index = start
+    while end is None or index < end:
+        if (index - start) % every:
+            # grab() still decodes, but skips the colour conversion and recognition
+            if not cap.grab():
+                break
+        else:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            records.append({'source': path, 'frame': index, 'faces': recognize_frame(frame)})
+        index += 1
+
+    cap.release()
+    return records
+
+def build_tasks(inputs, every=1, segment_frames=600):
+    """Expand directories and videos into image and video-segment tasks"""
+    tasks = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    tasks.append(('image', os.path.join(path, name), 0, None, 1))
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            tasks.append(('image', path, 0, None, 1))
+        else:
+            cap = cv2.VideoCapture(path)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+            cap.release()
+
+            if frame_count <= 0:
+                # Unknown length (or a stream): one task for the whole file
+                tasks.append(('video', path, 0, None, every))
+                continue
+
+            # Segments start on a multiple of every, so sampling stays regular across them
+            segment = max(every, segment_frames - segment_frames % every)
+            for start in range(0, frame_count, segment):
+                tasks.append(('video', path, start, min(start + segment, frame_count), every))
+    return tasks
+
+def run_batch(inputs, output, workers=None, every=1, detector=None, scale=0.25,
+              gallery_path="EncodedImages.gallery", tolerance=0.6, confidence_threshold=0.6):
+    """Recognize faces in image folders and video files, writing JSON Lines results"""
+    tasks = build_tasks(inputs, every)
+    if not tasks:
+        print("Error: No images or videos found!")
+        return False
+
+    # An initializer that raises makes the pool respawn workers forever, so fail here instead
+    try:
+        gallery_file = open_gallery(gallery_path)
+    except Exception as e:
+        print(f"Error loading gallery {gallery_path}: {str(e)}")
+        return False
+    if gallery_file is None:
+        print(f"Error: Gallery {gallery_path} not found, generate encodings first")
+        return False
+
+    workers = workers or os.cpu_count() or 1
+    print(f"Processing {len(tasks)} tasks with {workers} workers...", file=sys.stderr)
+
+    frames = 0
+    faces = 0
+    start_time = time.time()
+    out = open(output, 'w') if output != '-' else sys.stdout
+    try:
+        with Pool(workers, initializer=init_worker,
+                  initargs=(gallery_path, detector, scale, tolerance, confidence_threshold)) as pool:
+            # imap keeps the output in input order
+            for done, records in enumerate(pool.imap(process_task, tasks), 1):
+                for record in records:
+                    out.write(json.dumps(record) + "\n")
+                    frames += 1
+                    faces += len(record.get('faces', []))
+
+                elapsed = time.time() - start_time
+                print(f"[{done}/{len(tasks)}] {frames} frames, {frames / max(elapsed, 1e-9):.1f} frames/s",
+                      file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.time() - start_time
+    print(f"Done: {frames} frames, {faces} faces in {elapsed:.1f}s "
+          f"({frames / max(elapsed, 1e-9):.1f} frames/s)", file=sys.stderr)
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch face recognition over image folders and video files")
+    parser.add_argument("inputs", nargs="+", help="image folders, image files or video files")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSON Lines output file ('-' for stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--every", type=int, default=1, help="only recognize every Nth video frame")
+    parser.add_argument("--detector", default=None, help="face detector backend (default: $FACE_DETECTOR or hog)")
+    parser.add_argument("--scale", type=float, default=0.25, help="downscale used for detection")
+    parser.add_argument("--gallery", default="EncodedImages.gallery", help="gallery file to match against")
+    args = parser.parse_args()
+
+    ok = run_batch(args.inputs, args.output, args.workers, max(1, args.every), args.detector,
+                   args.scale, args.gallery)
+    sys.exit(0 if ok else 1)
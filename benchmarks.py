@@ -0,0 +1,464 @@
+import os
+import json
+import time
+import pickle
+import sqlite3
+import argparse
+import platform
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+from gallery import Gallery
+from gallery_store import write_gallery, open_gallery
+from database_manager import DatabaseManager
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def synthetic_gallery(size, dim=128, people=None, noise=0.05, seed=0):
+    """Return a (size, dim) float32 matrix of face-like random encodings.
+
+    Rows are drawn around a set of identity centres, which gives the
+    clustered structure real embeddings have (pure uniform noise would be
+    an unrealistically hard case for any ANN index).
+    """
+    rng = np.random.default_rng(seed)
+    people = people or max(1, size // 4)
+    centres = rng.normal(0.0, 0.09, (people, dim)).astype(np.float32)
+    rows = centres[rng.integers(0, people, size)] + rng.normal(0.0, noise, (size, dim)).astype(np.float32)
+    return rows.astype(np.float32)
+
+def synthetic_queries(gallery_matrix, count, noise=0.03, seed=1):
+    """Return noisy copies of random gallery rows, like a new sighting of a known face"""
+    rng = np.random.default_rng(seed)
+    rows = gallery_matrix[rng.integers(0, len(gallery_matrix), count)]
+    return (rows + rng.normal(0.0, noise, rows.shape)).astype(np.float32)
+
+def _time_per_call(func, repeat):
+    """Return the mean seconds per call of func over repeat runs"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+@contextmanager
+def _scratch_dir():
+    """Run in a temporary working directory, so the default database and gallery stay untouched"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            yield tmp_dir
+        finally:
+            os.chdir(cwd)
+
+def bench_ann(sizes, queries=200, k=10, n_probe=8, faces_per_frame=1):
+    """Compare IVF search against the brute-force scan for recall and latency"""
+    results = []
+    for size in sizes:
+        matrix = synthetic_gallery(size)
+        query_rows = synthetic_queries(matrix, queries)
+        gallery = Gallery(matrix, [str(i) for i in range(size)], n_probe=n_probe)
+
+        start = time.perf_counter()
+        gallery.ann_index()
+        build_time = time.perf_counter() - start
+
+        exact_idx, _ = gallery.search(query_rows, k, exact=True)
+        ann_idx, _ = gallery.search(query_rows, k, exact=False)
+        recall_1 = float(np.mean(exact_idx[:, 0] == ann_idx[:, 0]))
+        recall_k = float(np.mean([len(set(e) & set(a)) / len(e) for e, a in zip(exact_idx, ann_idx)]))
+
+        frame = query_rows[:faces_per_frame]
+        exact_ms = _time_per_call(lambda: gallery.search(frame, k, exact=True), 20) * 1000
+        ann_ms = _time_per_call(lambda: gallery.search(frame, k, exact=False), 20) * 1000
+
+        results.append({
+            'size': size, 'n_lists': gallery.ann_index().n_lists, 'n_probe': n_probe,
+            'build_s': build_time, 'recall_at_1': recall_1, f'recall_at_{k}': recall_k,
+            'exact_ms': exact_ms, 'ann_ms': ann_ms,
+        })
+        print(f"{size:>9} rows | build {build_time:6.2f}s | recall@1 {recall_1:.3f} "
+              f"recall@{k} {recall_k:.3f} | exact {exact_ms:7.2f} ms | ann {ann_ms:7.2f} ms")
+    return results
+
+def _connect_per_call_ops(db_path):
+    """The same operations as DatabaseManager, opening a connection per call"""
+    def get_user(user_id):
+        conn = sqlite3.connect(db_path)
+        conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        conn.close()
+
+    def log_access(user_id, access_granted):
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO access_logs (user_id, access_granted) VALUES (?, ?)",
+                     (user_id, access_granted))
+        conn.execute("UPDATE users SET last_access = CURRENT_TIMESTAMP WHERE user_id = ?", (user_id,))
+        conn.commit()
+        conn.close()
+
+    return get_user, log_access
+
+def bench_db(operations=2000, users=1000):
+    """ops/sec of get_user and synchronous log_access, per-call connections vs pooled"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        db_manager = DatabaseManager(db_path)
+        for i in range(users):
+            db_manager.add_user(f"user_{i}", f"User {i}")
+
+        get_user, log_access = _connect_per_call_ops(db_path)
+        cases = {
+            'get_user': (get_user, db_manager.get_user),
+            'log_access': (log_access, db_manager.log_access),
+        }
+        for name, (before, after) in cases.items():
+            for label, func in (('connect_per_call', before), ('pooled', after)):
+                start = time.perf_counter()
+                for i in range(operations):
+                    if name == 'get_user':
+                        func(f"user_{i % users}")
+                    else:
+                        func(f"user_{i % users}", True)
+                ops = operations / (time.perf_counter() - start)
+                results[f"{name}.{label}"] = ops
+                print(f"{name:>10} {label:>16}: {ops:10.0f} ops/s")
+
+        db_manager.pool.close()
+    return results
+
+def _populate_access_logs(db_manager, rows, users=1000, days=365, chunk=100000, seed=0):
+    """Insert rows synthetic access logs spread evenly over the last days"""
+    rng = np.random.default_rng(seed)
+    conn = db_manager.pool.get()
+    now = time.time()
+    for start in range(0, rows, chunk):
+        count = min(chunk, rows - start)
+        # Increasing timestamps, like a real log
+        stamps = now - days * 86400 * (1 - (np.arange(start, start + count) / rows))
+        user_ids = rng.integers(0, users, count)
+        granted = rng.random(count) < 0.9
+        conn.executemany(
+            "INSERT INTO access_logs (user_id, access_time, access_granted) VALUES (?, ?, ?)",
+            ((f"user_{u}", time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(t)), bool(g))
+             for u, t, g in zip(user_ids, stamps, granted)))
+        conn.commit()
+
+def bench_logs(rows=10000000, page_size=100, deep_page=1000, archive_days=300):
+    """Access log listing, deep paging and archival on a large access_logs table"""
+    results = {}
+
+    def timed(label, func, repeat=5):
+        seconds = _time_per_call(func, repeat)
+        results[label] = seconds * 1000
+        print(f"{label:>28}: {seconds * 1000:10.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, "bench.db"))
+        db_manager.archive_dir = os.path.join(tmp_dir, "archive")
+        for i in range(1000):
+            db_manager.add_user(f"user_{i}", f"User {i}")
+
+        start = time.perf_counter()
+        _populate_access_logs(db_manager, rows)
+        print(f"Inserted {rows} rows in {time.perf_counter() - start:.1f}s")
+        conn = db_manager.pool.get()
+
+        timed("newest page (indexed)", lambda: db_manager.get_access_logs(page_size))
+        timed("newest page (no index)", lambda: conn.execute('''
+            SELECT al.id, al.user_id, al.access_time, al.access_granted, u.name FROM access_logs al NOT INDEXED
+            LEFT JOIN users u ON al.user_id = u.user_id
+            ORDER BY al.access_time DESC, al.id DESC LIMIT ?''', (page_size,)).fetchall(), repeat=1)
+
+        offset = page_size * deep_page
+        timed(f"page {deep_page} (OFFSET)", lambda: conn.execute('''
+            SELECT al.id, al.user_id, al.access_time, al.access_granted, u.name FROM access_logs al
+            LEFT JOIN users u ON al.user_id = u.user_id
+            ORDER BY al.access_time DESC, al.id DESC LIMIT ? OFFSET ?''', (page_size, offset)).fetchall())
+        cursor_row = conn.execute(
+            "SELECT access_time, id FROM access_logs ORDER BY access_time DESC, id DESC LIMIT 1 OFFSET ?",
+            (offset - 1,)).fetchone()
+        timed(f"page {deep_page} (keyset)", lambda: db_manager.get_access_logs_page(cursor_row, page_size))
+        timed("one user's newest page", lambda: db_manager.get_access_logs_page(None, page_size, "user_7"))
+
+        start = time.perf_counter()
+        archived, _ = db_manager.archive_access_logs(archive_days)
+        seconds = time.perf_counter() - start
+        results['archive_rows'] = archived
+        results['archive_rows_per_s'] = archived / max(seconds, 1e-9)
+        print(f"{'archive':>28}: {archived} rows in {seconds:.1f}s")
+
+        db_manager.pool.close()
+    return results
+
+def load_frames(images_dir=None, video=None, limit=200, every=1):
+    """Return up to limit BGR frames from an image folder or a video file"""
+    import cv2
+
+    frames = []
+    if video:
+        cap = cv2.VideoCapture(video)
+        index = 0
+        while len(frames) < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % every == 0:
+                frames.append(frame)
+            index += 1
+        cap.release()
+    else:
+        for name in sorted(os.listdir(images_dir))[:limit]:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                frame = cv2.imread(os.path.join(images_dir, name))
+                if frame is not None:
+                    frames.append(frame)
+    return frames
+
+def bench_detect(frames, backends=None, scale=0.25):
+    """ms/frame and faces found for each detector backend on the same frames"""
+    import cv2
+    from run_face_recognition import DETECTOR_BACKENDS, create_detector_backend
+
+    small = [cv2.cvtColor(cv2.resize(frame, (0, 0), None, scale, scale), cv2.COLOR_BGR2RGB)
+             for frame in frames]
+    results = {}
+    for name in backends or sorted(DETECTOR_BACKENDS):
+        backend = create_detector_backend(name)
+        start = time.perf_counter()
+        faces = sum(len(backend.detect(image)) for image in small)
+        ms = (time.perf_counter() - start) * 1000 / max(len(small), 1)
+        results[name] = {'ms_per_frame': ms, 'faces': faces}
+        print(f"{name:>8}: {ms:8.2f} ms/frame, {faces} faces in {len(small)} frames")
+    return results
+
+def bench_match(sizes, faces_per_frame=(1, 5), repeat=50):
+    """Gallery.match latency per frame, as the recognition loop calls it"""
+    results = {}
+    for size in sizes:
+        matrix = synthetic_gallery(size)
+        gallery = Gallery(matrix, [f"user_{i}" for i in range(size)])
+        if size > gallery.exact_search_limit:
+            gallery.ann_index()  # Built once at load time, not per frame
+
+        results[str(size)] = {}
+        for faces in faces_per_frame:
+            frame = synthetic_queries(matrix, faces)
+            ms = _time_per_call(lambda: gallery.match(frame), repeat) * 1000
+            results[str(size)][f"faces_{faces}_ms"] = ms
+            print(f"{size:>9} rows | {faces} face(s)/frame | match {ms:8.3f} ms")
+    return results
+
+def bench_load(sizes, pickle_limit=100000):
+    """Time to load a gallery from disk, memory-mapped file versus the legacy pickle"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            matrix = synthetic_gallery(size)
+            ids = [f"user_{i}" for i in range(size)]
+            gallery_path = os.path.join(tmp_dir, f"{size}.gallery")
+            pickle_path = os.path.join(tmp_dir, f"{size}.p")
+            write_gallery(gallery_path, matrix, ids)
+
+            def load_mapped():
+                gallery_file = open_gallery(gallery_path)
+                gallery = Gallery(gallery_file.encodings, gallery_file.ids)
+                gallery.search(matrix[:1], exact=True)  # First scan touches every page
+
+            def load_pickle():
+                with open(pickle_path, 'rb') as file:
+                    encodings, pickled_ids = pickle.load(file)
+                gallery = Gallery(np.asarray(encodings, dtype=np.float32), pickled_ids)
+                gallery.search(matrix[:1], exact=True)
+
+            results[str(size)] = {'mapped_ms': _time_per_call(load_mapped, 3) * 1000}
+            line = f"{size:>9} rows | mmap gallery {results[str(size)]['mapped_ms']:9.1f} ms"
+
+            # The legacy format pickles one array per person, too slow and large to write past pickle_limit
+            if size <= pickle_limit:
+                with open(pickle_path, 'wb') as file:
+                    pickle.dump([list(matrix.astype(np.float64)), ids], file)
+                results[str(size)]['pickle_ms'] = _time_per_call(load_pickle, 1) * 1000
+                line += f" | pickle {results[str(size)]['pickle_ms']:9.1f} ms"
+                os.remove(pickle_path)
+            os.remove(gallery_path)
+            print(line)
+    return results
+
+def bench_encode(images_dir, workers=None, limit=200):
+    """Encoding throughput (images/s) on a folder of face images, one process and a pool"""
+    # Absolute, as the encoding runs inside the scratch directory
+    images_dir = os.path.abspath(images_dir)
+    paths = [os.path.join(images_dir, name) for name in sorted(os.listdir(images_dir))
+             if name.lower().endswith(IMAGE_EXTENSIONS)][:limit]
+    if not paths:
+        print(f"No images in {images_dir}, skipping encoding benchmark")
+        return {}
+
+    from enhanced_encoder import EnhancedEncoder
+
+    workers = workers or os.cpu_count() or 1
+    results = {'images': len(paths)}
+    with _scratch_dir():
+        encoder = EnhancedEncoder()
+        for label, count in (('single', 1), ('pool', workers)):
+            start = time.perf_counter()
+            encoded = sum(1 for _, encoding, _ in encoder._encode_files(paths, count) if encoding is not None)
+            rate = len(paths) / (time.perf_counter() - start)
+            print(f"encode {label:>6} ({count} process(es)): {rate:8.1f} img/s, {encoded}/{len(paths)} encoded")
+            if encoded == 0:
+                # Unreadable images or no faces: the rate would only measure the failures
+                print(f"No faces encoded from {images_dir}, skipping encoding benchmark")
+                results = {}
+                break
+            results[f"{label}_images_per_s"] = rate
+        encoder.db_manager.pool.close()
+    return results
+
+def bench_end_to_end(frames, gallery_size=10000, detector=None):
+    """Frames/s of the full per-frame path (detect, track, encode, match, draw) on replayed frames"""
+    if not frames:
+        print("No frames to replay, skipping end-to-end benchmark")
+        return {}
+
+    from run_face_recognition import FaceRecognitionSystem
+
+    with _scratch_dir():
+        matrix = synthetic_gallery(gallery_size)
+        write_gallery("EncodedImages.gallery", matrix, [f"user_{i}" for i in range(gallery_size)])
+        system = FaceRecognitionSystem(detector_backend=detector)
+
+        system.recognize_face(frames[0].copy())  # Warm up detector and caches
+        start = time.perf_counter()
+        for frame in frames:
+            system.recognize_face(frame.copy())
+        seconds = time.perf_counter() - start
+
+        system.log_visits(system.visits.close_all())
+        system.live_gallery.stop_watching()
+        system.db_manager.stop_log_writer()
+        system.db_manager.pool.close()
+
+    results = {'frames': len(frames), 'fps': len(frames) / seconds, 'ms_per_frame': seconds * 1000 / len(frames),
+               'gallery_size': gallery_size}
+    print(f"end-to-end: {results['fps']:.1f} fps ({results['ms_per_frame']:.1f} ms/frame) "
+          f"over {len(frames)} frames, {gallery_size} gallery rows")
+    return results
+
+def run_suite(sizes, images_dir, video=None, frames=200, operations=2000, detector=None):
+    """Run every camera-free benchmark and return the results as one dict"""
+    import cv2
+
+    results = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'cpu_count': os.cpu_count(),
+        },
+    }
+    print("== match latency"); results['match'] = bench_match(sizes)
+    print("== gallery load"); results['load'] = bench_load(sizes)
+    print("== encoding"); results['encode'] = bench_encode(images_dir)
+
+    # Replay the video, or the test images as a sequence of frames when there is none
+    replay = load_frames(images_dir, video, limit=frames)
+    if replay and not video:
+        replay = (replay * (frames // len(replay) + 1))[:frames]
+    print("== end-to-end"); results['end_to_end'] = bench_end_to_end(replay, detector=detector)
+    print("== database"); results['db'] = bench_db(operations)
+    return results
+
+def _flatten(results, prefix=""):
+    """Return {dotted.key: value} for every numeric leaf of a results dict"""
+    flat = {}
+    for key, value in results.items():
+        if key == 'meta':
+            continue
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+def _higher_is_better(key):
+    return key.endswith(('_per_s', 'fps', 'pooled', 'connect_per_call')) or 'recall' in key
+
+def compare_results(baseline, current, tolerance=0.10):
+    """Print the change of every metric, returns the keys that regressed by more than tolerance"""
+    base, cur = _flatten(baseline), _flatten(current)
+    regressions = []
+    for key in sorted(base.keys() & cur.keys()):
+        if key.endswith(('.images', '.frames', '.gallery_size')) or not base[key]:
+            continue
+        change = (cur[key] - base[key]) / base[key]
+        worse = -change if _higher_is_better(key) else change
+        flag = ""
+        if worse > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:>40}: {base[key]:12.3f} -> {cur[key]:12.3f} ({change:+.1%}){flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Face recognition performance benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ann_parser = subparsers.add_parser("ann", help="ANN index recall/latency against brute force")
+    ann_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 300000])
+    ann_parser.add_argument("--queries", type=int, default=200)
+    ann_parser.add_argument("--k", type=int, default=10)
+    ann_parser.add_argument("--n-probe", type=int, default=8)
+
+    db_parser = subparsers.add_parser("db", help="DatabaseManager ops/sec, per-call connections vs pooled")
+    db_parser.add_argument("--operations", type=int, default=2000)
+
+    logs_parser = subparsers.add_parser("logs", help="access log queries and archival on a large table")
+    logs_parser.add_argument("--rows", type=int, default=10000000)
+    logs_parser.add_argument("--archive-days", type=int, default=300)
+
+    detect_parser = subparsers.add_parser("detect", help="compare face detector backends")
+    detect_parser.add_argument("--images", default="img/Modes", help="folder of test images")
+    detect_parser.add_argument("--video", default=None, help="video file to use instead of --images")
+    detect_parser.add_argument("--backends", nargs="+", default=None)
+    detect_parser.add_argument("--scale", type=float, default=0.25)
+
+    suite_parser = subparsers.add_parser("suite", help="run every camera-free benchmark and save JSON results")
+    suite_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    suite_parser.add_argument("--images", default="img/Modes", help="folder of test face images")
+    suite_parser.add_argument("--video", default=None, help="video to replay for the end-to-end benchmark")
+    suite_parser.add_argument("--frames", type=int, default=200)
+    suite_parser.add_argument("--detector", default=None)
+    suite_parser.add_argument("--output", default="benchmark_results.json")
+    suite_parser.add_argument("--compare", default=None, help="baseline results JSON to check for regressions")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two saved results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10)
+
+    args = parser.parse_args()
+    if args.command == "suite":
+        results = run_suite(args.sizes, args.images, args.video, args.frames, detector=args.detector)
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Results saved to {args.output}")
+        if args.compare:
+            with open(args.compare) as file:
+                return 1 if compare_results(json.load(file), results) else 0
+    elif args.command == "compare":
+        with open(args.baseline) as baseline, open(args.current) as current:
+            return 1 if compare_results(json.load(baseline), json.load(current), args.tolerance) else 0
+    elif args.command == "ann":
+        bench_ann(args.sizes, args.queries, args.k, args.n_probe)
+    elif args.command == "db":
+        bench_db(args.operations)
+    elif args.command == "logs":
+        bench_logs(args.rows, archive_days=args.archive_days)
+    elif args.command == "detect":
+        bench_detect(load_frames(args.images, args.video), args.backends, args.scale)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
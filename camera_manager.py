@@ -0,0 +1,119 @@
+import time
+import threading
+import cv2
+from frame_pipeline import DropOldestQueue
+
+class CameraSubscription:
+    """One consumer's view of a shared camera: a drop-oldest queue of (frame, captured_at)"""
+
+    def __init__(self, camera, maxsize=1):
+        self.camera = camera
+        self.frames = DropOldestQueue(maxsize)
+        self.failed = threading.Event()  # Set when the source stopped delivering frames
+
+    def get(self, timeout=None):
+        """Return the next (frame, captured_at), or None on timeout"""
+        return self.frames.get(timeout)
+
+    def close(self):
+        self.camera.unsubscribe(self)
+
+class CameraManager:
+    """Owns one video source and fans its frames out to every subscriber.
+
+    A single capture thread reads the device and hands the same frame
+    object to each subscription, without copying. Frames are marked
+    read-only, so a consumer that wants to draw on one must copy it first.
+    The device stays open for release_after seconds after the last
+    subscriber leaves, so switching between enrollment and checking does
+    not pay the open and auto-exposure warm-up again.
+    """
+
+    def __init__(self, source=0, release_after=30.0):
+        self.source = source
+        self.release_after = release_after
+        self.frames = 0
+
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._thread = None
+        self._idle_since = None
+        self._closing = False
+        self._latest = None
+
+    def subscribe(self, maxsize=1):
+        """Return a new CameraSubscription, opening the source if needed; None if it cannot be opened"""
+        with self._lock:
+            if self._thread is None:
+                cap = cv2.VideoCapture(self.source)
+                if not cap.isOpened():
+                    print(f"Error: Could not open camera {self.source}")
+                    cap.release()
+                    return None
+                self._closing = False
+                self._latest = None
+                self._thread = threading.Thread(target=self._run, args=(cap,), name=f"camera-{self.source}",
+                                                daemon=True)
+                self._thread.start()
+
+            subscription = CameraSubscription(self, maxsize)
+            self._subscribers.append(subscription)
+            self._idle_since = None
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            if not self._subscribers:
+                self._idle_since = time.time()
+
+    def latest_frame(self):
+        """Return the newest (frame, captured_at), e.g. for a snapshot, or None"""
+        return self._latest
+
+    def _run(self, cap):
+        while True:
+            ret, frame = cap.read()
+            captured_at = time.time()
+
+            with self._lock:
+                idle_expired = (not self._subscribers and self._idle_since is not None
+                                and captured_at - self._idle_since >= self.release_after)
+                if not ret or self._closing or idle_expired:
+                    if not ret:
+                        print(f"Error: Could not read frame from {self.source}")
+                    # Whoever is still subscribed will not get another frame
+                    for subscription in self._subscribers:
+                        subscription.failed.set()
+                    # Released under the lock, so a new subscriber opens the device afresh
+                    cap.release()
+                    self._thread = None
+                    return
+                subscribers = list(self._subscribers)
+
+            # Shared between all consumers: nobody may draw on it
+            frame.flags.writeable = False
+            self._latest = (frame, captured_at)
+            self.frames += 1
+            for subscription in subscribers:
+                subscription.frames.put((frame, captured_at))
+
+    def close(self, timeout=2):
+        """Stop capturing and release the device now"""
+        with self._lock:
+            self._closing = True
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+_cameras = {}
+_cameras_lock = threading.Lock()
+
+def get_camera(source=0):
+    """Return the process-wide CameraManager for source"""
+    with _cameras_lock:
+        camera = _cameras.get(source)
+        if camera is None:
+            camera = _cameras[source] = CameraManager(source)
+        return camera
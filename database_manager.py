@@ -1,16 +1,42 @@
 import sqlite3
 import hashlib
 import os
-from datetime import datetime
+import threading
+import csv
+import gzip
+import time
+from datetime import datetime, timedelta, timezone
+from db_connections import get_pool
+from user_directory import UserDirectory
+from access_log_writer import AccessLogWriter, utc_timestamp
+
+# Database files whose schema was already created by this process
+_initialized_paths = set()
+_init_lock = threading.Lock()
 
 class DatabaseManager:
     def __init__(self, db_path="face_recognition.db"):
         self.db_path = db_path
-        self.init_database()
+        self.pool = get_pool(db_path)
+        self.user_directory = None
+        self.log_writer = None
+        self.log_retention_days = 90
+        self.archive_dir = "archive"
+        self._archive_lock = threading.Lock()  # One archive run at a time, so they do not archive the same rows
+        
+        # Every DatabaseManager on the same file shares one schema setup
+        with _init_lock:
+            if os.path.abspath(db_path) not in _initialized_paths:
+                self.init_database()
+                _initialized_paths.add(os.path.abspath(db_path))
+    
+    def _connection(self):
+        """Return the calling thread's long-lived connection"""
+        return self.pool.get()
     
     def init_database(self):
         """Initialize the database with required tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         # Create admin table
@@ -35,6 +61,24 @@ class DatabaseManager:
             )
         ''')
         
+        # Bumped by triggers whenever a user is added, renamed, (de)activated or deleted, but not
+        # by last_access updates, so the in-memory user directory knows when to reload
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO users_version (id, version) VALUES (1, 0)")
+        for trigger, event in (("users_version_insert", "INSERT"), ("users_version_delete", "DELETE"),
+                               ("users_version_update", "UPDATE OF user_id, name, status")):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event} ON users
+                BEGIN
+                    UPDATE users_version SET version = version + 1 WHERE id = 1;
+                END
+            ''')
+        
         # Create access logs table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS access_logs (
@@ -42,10 +86,28 @@ class DatabaseManager:
                 user_id TEXT,
                 access_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 access_granted BOOLEAN,
+                visit_end TIMESTAMP,
+                confidence REAL,
+                sightings INTEGER DEFAULT 1,
+                visit_id TEXT,
                 FOREIGN KEY (user_id) REFERENCES users (user_id)
             )
         ''')
         
+        # Add the visit columns to access logs created before they existed
+        cursor.execute("PRAGMA table_info(access_logs)")
+        log_columns = {row[1] for row in cursor.fetchall()}
+        for column, column_type in (("visit_end", "TIMESTAMP"), ("confidence", "REAL"),
+                                    ("sightings", "INTEGER DEFAULT 1"), ("visit_id", "TEXT")):
+            if column not in log_columns:
+                cursor.execute(f"ALTER TABLE access_logs ADD COLUMN {column} {column_type}")
+        
+        # Indexes for newest-first listing and per-user history
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_access_logs_time ON access_logs (access_time)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_access_logs_user ON access_logs (user_id, access_time)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_access_logs_visit ON access_logs (visit_id) "
+                       "WHERE visit_id IS NOT NULL")
+        
         # Create default admin if none exists
         cursor.execute("SELECT COUNT(*) FROM admins")
         if cursor.fetchone()[0] == 0:
@@ -55,7 +117,6 @@ class DatabaseManager:
             print("Default admin created - Username: admin, Password: admin123")
         
         conn.commit()
-        conn.close()
     
     def hash_password(self, password):
         """Hash password using SHA-256"""
@@ -63,20 +124,25 @@ class DatabaseManager:
     
     def verify_admin(self, username, password):
         """Verify admin credentials"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         password_hash = self.hash_password(password)
         cursor.execute("SELECT id FROM admins WHERE username = ? AND password_hash = ?", 
                       (username, password_hash))
         result = cursor.fetchone()
-        conn.close()
         
         return result is not None
     
+    def get_user_directory(self):
+        """Return the in-memory user directory, loading it on first use"""
+        if self.user_directory is None:
+            self.user_directory = UserDirectory(self.db_path)
+        return self.user_directory
+    
     def add_user(self, user_id, name):
         """Add a new user to the database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         try:
@@ -85,37 +151,36 @@ class DatabaseManager:
                 VALUES (?, ?)
             ''', (user_id, name))
             conn.commit()
-            conn.close()
+            if self.user_directory is not None:
+                self.user_directory.put(user_id, name, 'active')
             return True
         except sqlite3.IntegrityError:
-            conn.close()
+            conn.rollback()
             return False
     
     def get_user(self, user_id):
         """Get user information by user_id"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
         result = cursor.fetchone()
-        conn.close()
         
         return result
     
     def get_all_users(self):
         """Get all users from database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         cursor.execute("SELECT * FROM users ORDER BY created_at DESC")
         results = cursor.fetchall()
-        conn.close()
         
         return results
     
     def update_user(self, user_id, name=None, status=None):
         """Update user information"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         updates = []
@@ -133,52 +198,235 @@ class DatabaseManager:
             query = f"UPDATE users SET {', '.join(updates)} WHERE user_id = ?"
             cursor.execute(query, params)
             conn.commit()
-        
-        conn.close()
+            if self.user_directory is not None and cursor.rowcount:
+                self.user_directory.put(user_id, name, status)
     
     def delete_user(self, user_id):
         """Delete user from database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         cursor.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
         conn.commit()
-        conn.close()
+        
+        if self.user_directory is not None:
+            self.user_directory.remove(user_id)
+    
+    def start_log_writer(self, **options):
+        """Switch log_access to the batched write-behind writer"""
+        if self.log_writer is None:
+            self.log_writer = AccessLogWriter(self.db_path, **options)
+        return self.log_writer
+    
+    def stop_log_writer(self):
+        """Flush pending access logs and go back to synchronous writes"""
+        if self.log_writer is not None:
+            self.log_writer.close()
+            self.log_writer = None
     
-    def log_access(self, user_id, access_granted):
-        """Log access attempt"""
-        conn = sqlite3.connect(self.db_path)
+    def log_access(self, user_id, access_granted, access_time=None, visit_end=None,
+                   confidence=None, sightings=1, visit_id=None):
+        """Log access attempt, or a whole visit when visit_end is given.
+        
+        A visit logged with a visit_id when it starts is completed later by end_visit.
+        """
+        # Queue it when the write-behind writer is running
+        if self.log_writer is not None:
+            return self.log_writer.log(user_id, access_granted, access_time, visit_end,
+                                       confidence, sightings, visit_id)
+        
+        conn = self._connection()
         cursor = conn.cursor()
+        access_time = access_time or utc_timestamp()
         
         cursor.execute('''
-            INSERT INTO access_logs (user_id, access_granted)
-            VALUES (?, ?)
-        ''', (user_id, access_granted))
+            INSERT INTO access_logs (user_id, access_time, access_granted, visit_end, confidence, sightings,
+                                     visit_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (user_id, access_time, access_granted, visit_end, confidence, sightings, visit_id))
         
         # Update last access time for the user if access was granted
         if access_granted:
             cursor.execute('''
-                UPDATE users SET last_access = CURRENT_TIMESTAMP 
+                UPDATE users SET last_access = ? 
                 WHERE user_id = ?
-            ''', (user_id,))
+            ''', (visit_end or access_time, user_id))
         
         conn.commit()
-        conn.close()
+        return True
+    
+    def end_visit(self, visit_id, visit_end, confidence, sightings, user_id=None, access_granted=False,
+                  access_time=None):
+        """Record the end of a visit logged by log_access with visit_id.
+        
+        access_time is the visit start; the whole visit is logged from it
+        if its row is missing.
+        """
+        if self.log_writer is not None:
+            return self.log_writer.end_visit(visit_id, visit_end, confidence, sightings,
+                                             user_id, access_granted, access_time)
+        
+        conn = self._connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE access_logs SET visit_end = ?, confidence = ?, sightings = ?
+            WHERE visit_id = ?
+        ''', (visit_end, confidence, sightings, visit_id))
+        if not cursor.rowcount:
+            cursor.execute('''
+                INSERT INTO access_logs (user_id, access_time, access_granted, visit_end, confidence, sightings,
+                                         visit_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, access_time or visit_end, access_granted, visit_end, confidence, sightings, visit_id))
+        
+        if access_granted:
+            cursor.execute('''
+                UPDATE users SET last_access = ? 
+                WHERE user_id = ?
+            ''', (visit_end, user_id))
+        
+        conn.commit()
+        return True
     
     def get_access_logs(self, limit=100):
         """Get access logs"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT al.*, u.name 
+            SELECT al.id, al.user_id, al.access_time, al.access_granted, u.name,
+                   al.visit_end, al.confidence, al.sightings
             FROM access_logs al
             LEFT JOIN users u ON al.user_id = u.user_id
-            ORDER BY al.access_time DESC
+            ORDER BY al.access_time DESC, al.id DESC
             LIMIT ?
         ''', (limit,))
         
         results = cursor.fetchall()
-        conn.close()
         
-        return results
\ No newline at end of file
+        return results
+    
+    def get_access_logs_page(self, before=None, limit=100, user_id=None, access_granted=None,
+                             since=None, until=None, after_id=None):
+        """Get one page of access logs, newest first, using keyset pagination.
+        
+        before is the (access_time, id) of the last row of the previous page,
+        None for the first page. Unlike OFFSET, every page costs the same no
+        matter how deep into the history it is. after_id only returns rows
+        inserted after the row with that id, to pick up new logs on refresh.
+        Filters: user_id, access_granted (True/False), and access_time in
+        [since, until) as 'YYYY-MM-DD HH:MM:SS' UTC strings.
+        """
+        conn = self._connection()
+        cursor = conn.cursor()
+        
+        conditions = []
+        params = []
+        
+        if before is not None:
+            conditions.append("(al.access_time, al.id) < (?, ?)")
+            params.extend(before)
+        if after_id is not None:
+            conditions.append("al.id > ?")
+            params.append(after_id)
+        if user_id is not None:
+            conditions.append("al.user_id = ?")
+            params.append(user_id)
+        if access_granted is not None:
+            conditions.append("al.access_granted = ?")
+            params.append(bool(access_granted))
+        if since is not None:
+            conditions.append("al.access_time >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("al.access_time < ?")
+            params.append(until)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # New rows are few: range-scan them by id and sort, rather than walking the time index
+        order_time = "+al.access_time" if after_id is not None else "al.access_time"
+        params.append(limit)
+        cursor.execute(f'''
+            SELECT al.id, al.user_id, al.access_time, al.access_granted, u.name,
+                   al.visit_end, al.confidence, al.sightings
+            FROM access_logs al
+            LEFT JOIN users u ON al.user_id = u.user_id
+            {where}
+            ORDER BY {order_time} DESC, al.id DESC
+            LIMIT ?
+        ''', params)
+        
+        return cursor.fetchall()
+    
+    def archive_access_logs(self, older_than_days=None, batch_size=50000):
+        """Move access logs older than the retention period to a gzip CSV archive.
+        
+        Rows are copied in id order, batch by batch, and each batch is only
+        deleted after it has been written and synced to the archive file.
+        Returns (rows archived, archive path or None).
+        """
+        with self._archive_lock:
+            return self._archive_access_logs(older_than_days, batch_size)
+    
+    def _create_archive_file(self):
+        """Create a new, empty gzip CSV archive, returns (path, open text file).
+        
+        The name has one-second resolution, so runs within the same second
+        (or from another process) get a numbered suffix instead of truncating
+        an archive whose rows were already deleted.
+        """
+        os.makedirs(self.archive_dir, exist_ok=True)
+        stem = os.path.join(self.archive_dir, f"access_logs_{time.strftime('%Y%m%d_%H%M%S')}")
+        suffix = 0
+        while True:
+            archive_path = f"{stem}.csv.gz" if suffix == 0 else f"{stem}_{suffix}.csv.gz"
+            try:
+                return archive_path, gzip.open(archive_path, 'xt', newline='')
+            except FileExistsError:
+                suffix += 1
+    
+    def _archive_access_logs(self, older_than_days, batch_size):
+        if older_than_days is None:
+            older_than_days = self.log_retention_days
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).strftime('%Y-%m-%d %H:%M:%S')
+        
+        conn = self._connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT 1 FROM access_logs WHERE access_time < ? LIMIT 1", (cutoff,))
+        if cursor.fetchone() is None:
+            return 0, None
+        
+        archive_path, file = self._create_archive_file()
+        archived = 0
+        
+        with file:
+            writer = csv.writer(file)
+            writer.writerow(['id', 'user_id', 'access_time', 'access_granted',
+                             'visit_end', 'confidence', 'sightings'])
+            
+            while True:
+                cursor.execute('''
+                    SELECT id, user_id, access_time, access_granted, visit_end, confidence, sightings
+                    FROM access_logs
+                    WHERE access_time < ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (cutoff, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                
+                writer.writerows(rows)
+                file.flush()
+                os.fsync(file.fileno())
+                
+                # Every row older than the cutoff up to this id is now in the archive
+                cursor.execute("DELETE FROM access_logs WHERE access_time < ? AND id <= ?",
+                               (cutoff, rows[-1][0]))
+                conn.commit()
+                archived += len(rows)
+        
+        print(f"Archived {archived} access logs older than {cutoff} to {archive_path}")
+        return archived, archive_path
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import threading
+
+# Applied to every new connection. journal_mode=WAL is persistent in the
+# database file; the rest are per connection.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",       # Readers never block the writer and vice versa
+    "PRAGMA synchronous=NORMAL",     # Durable across crashes in WAL mode, no fsync per commit
+    "PRAGMA busy_timeout=5000",      # Wait for a concurrent writer instead of failing
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",       # 8 MB page cache
+)
+
+CACHED_STATEMENTS = 256
+
+def connect(db_path, check_same_thread=True):
+    """Open a connection with the project-wide pragmas and statement cache"""
+    conn = sqlite3.connect(db_path, timeout=5, cached_statements=CACHED_STATEMENTS,
+                           check_same_thread=check_same_thread)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+class ConnectionPool:
+    """One long-lived connection per thread for a database file.
+
+    sqlite3 connections must not be shared between threads, so each thread
+    (Tk, camera, encoder regeneration, log writer...) lazily opens its own
+    and keeps it for its lifetime; it is closed when the thread exits.
+    Repeated SQL reuses the connection's prepared-statement cache.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def get(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect(self.db_path)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection, if it has one"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path):
+    """Return the process-wide connection pool for db_path"""
+    # Keyed by absolute path, so a relative path stays the same file if the working directory changes
+    db_path = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = ConnectionPool(db_path)
+        return pool
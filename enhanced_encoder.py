@@ -2,16 +2,73 @@ import os
 import cv2
 import face_recognition
 import pickle
+import hashlib
+import time
+import argparse
+import multiprocessing
 from database_manager import DatabaseManager
+from gallery_store import write_gallery, open_gallery, convert_pickle
+from face_quality import FaceQualityGate
+
+def encode_first_face(img, quality_gate=None):
+    """Return the encoding of the first face in a BGR image, or None.
+
+    With a quality_gate, None is also returned when that face fails it.
+    """
+    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    # Find face locations first
+    face_locations = face_recognition.face_locations(img_rgb)
+    if not face_locations:
+        return None
+    if quality_gate is not None and not quality_gate.check(img_rgb, face_locations[0])[0]:
+        return None
+
+    # Get encodings for detected faces
+    face_encodings = face_recognition.face_encodings(img_rgb, face_locations)
+    if not face_encodings:
+        return None
+
+    return face_encodings[0]  # Take the first face
+
+def encode_image_file(img_path):
+    """Read one image file and encode its first face.
+
+    Runs inside pool workers, so only the path goes in and only the
+    128-d encoding comes back; the decoded image never leaves the worker.
+    Returns (img_path, encoding or None, error message or None).
+    """
+    img = cv2.imread(img_path)
+    if img is None:
+        return img_path, None, "Could not read image"
+
+    encoding = encode_first_face(img)
+    if encoding is None:
+        return img_path, None, "No face detected"
+
+    return img_path, encoding, None
 
 class EnhancedEncoder:
-    def __init__(self):
-        self.db_manager = DatabaseManager()
-        self.encodings_file = "EncodedImages.p"
+    def __init__(self, workers=None, db_manager=None):
+        self.db_manager = db_manager or DatabaseManager()
+        self.encodings_file = "EncodedImages.gallery"
+        self.legacy_encodings_file = "EncodedImages.p"
+        self.hashes_file = "EncodedImages.hashes.p"
+        self.modes_folder = 'img/Modes'
+        self.workers = workers or os.cpu_count() or 1
+        # Stricter than recognition: a poor enrollment photo hurts every later match
+        self.quality_gate = FaceQualityGate(min_face_size=100, min_brightness=50.0, max_brightness=210.0,
+                                            min_sharpness=60.0, max_yaw=0.25)
     
-    def generate_encoded_images(self):
-        """Generate encodings for all images in the img/Modes folder"""
-        folder_path = 'img/Modes'
+    def generate_encoded_images(self, workers=None):
+        """Generate encodings for all images in the img/Modes folder.
+
+        Images whose content hash matches the stored hash are not re-encoded,
+        only new or changed files go through detection and encoding, spread
+        over a pool of worker processes.
+        """
+        workers = workers or self.workers
+        folder_path = self.modes_folder
         
         if not os.path.exists(folder_path):
             print(f"Error: Folder '{folder_path}' does not exist!")
@@ -22,62 +79,156 @@ class EnhancedEncoder:
             print(f"Error: No images found in '{folder_path}'!")
             return False
         
-        img_list = []
-        models_ids = []
+        store, hashes = self.load_store()
+        new_store = {}
+        new_hashes = {}
+        reused = 0
         
-        print("Loading images...")
-        for path in path_list:
-            if path.lower().endswith(('.png', '.jpg', '.jpeg')):
-                img_path = os.path.join(folder_path, path)
-                img = cv2.imread(img_path)
-                if img is not None:
-                    img_list.append(img)
-                    models_ids.append(os.path.splitext(path)[0])
-                    print(f"Loaded: {path}")
+        to_encode = []
+        for path in sorted(path_list):
+            if not path.lower().endswith(('.png', '.jpg', '.jpeg')):
+                continue
         
-        if not img_list:
-            print("Error: No valid images found!")
-            return False
+            img_path = os.path.join(folder_path, path)
+            user_id = os.path.splitext(path)[0]
+            content_hash = self.file_hash(img_path)
         
-        print("Encoding started...")
-        encode_list_known = self.find_encodings(img_list)
+            # Reuse the stored encoding if the image has not changed
+            if hashes.get(user_id) == content_hash and user_id in store:
+                new_store[user_id] = store[user_id]
+                new_hashes[user_id] = content_hash
+                reused += 1
+            else:
+                to_encode.append((img_path, user_id, content_hash))
         
-        if not encode_list_known:
+        print(f"Encoding started ({len(to_encode)} images, {workers} workers)...")
+        pending = {img_path: (user_id, content_hash) for img_path, user_id, content_hash in to_encode}
+        start_time = time.time()
+
+        for done, (img_path, encoding, error) in enumerate(
+                self._encode_files([item[0] for item in to_encode], workers), 1):
+            user_id, content_hash = pending[img_path]
+            rate = done / max(time.time() - start_time, 1e-9)
+            name = os.path.basename(img_path)
+
+            if encoding is None:
+                print(f"[{done}/{len(to_encode)}] Warning: {error} in {name}")
+                continue
+
+            new_store[user_id] = encoding
+            new_hashes[user_id] = content_hash
+            print(f"[{done}/{len(to_encode)}] Face encoded for {name} ({rate:.1f} img/s)")
+
+        if to_encode:
+            elapsed = time.time() - start_time
+            print(f"Encoded {len(to_encode)} images in {elapsed:.1f}s "
+                  f"({len(to_encode) / max(elapsed, 1e-9):.1f} img/s)")
+
+        if not new_store:
             print("Error: No faces found in images!")
             return False
         
-        encode_list_known_with_ids = [encode_list_known, models_ids]
-        print("Encoding finished")
-        
-        # Save encodings to file
-        with open(self.encodings_file, 'wb') as file:
-            pickle.dump(encode_list_known_with_ids, file)
+        print(f"Encoding finished ({len(new_store) - reused} encoded, {reused} unchanged)")
         
+        self.save_store(new_store, new_hashes)
         print(f"Encodings saved to {self.encodings_file}")
         return True
+
+    def _encode_files(self, paths, workers):
+        """Yield (path, encoding, error) for each path as soon as it is done"""
+        if workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                yield encode_image_file(path)
+            return
+
+        # Spawned, not forked: this runs next to the GUI, camera and writer threads, and a
+        # child forked from a multithreaded OpenCV process can hang in cvtColor or resize
+        context = multiprocessing.get_context("spawn")
+        # imap_unordered keeps only the in-flight images decoded, one per worker
+        with context.Pool(processes=min(workers, len(paths))) as pool:
+            for result in pool.imap_unordered(encode_image_file, paths, chunksize=1):
+                yield result
+
+    def encode_image(self, img):
+        """Return the encoding of the first face in a BGR image, or None if there is no usable face"""
+        return encode_first_face(img, self.quality_gate)
     
     def find_encodings(self, images_list):
         """Find face encodings for a list of images"""
         encode_list = []
         
         for i, img in enumerate(images_list):
-            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            
-            # Find face locations first
-            face_locations = face_recognition.face_locations(img_rgb)
-            
-            if face_locations:
-                # Get encodings for detected faces
-                face_encodings = face_recognition.face_encodings(img_rgb, face_locations)
-                if face_encodings:
-                    encode_list.append(face_encodings[0])  # Take the first face
-                    print(f"Face encoded for image {i+1}")
-                else:
-                    print(f"Warning: No face encoding found for image {i+1}")
+            encoding = self.encode_image(img)
+            if encoding is not None:
+                encode_list.append(encoding)
+                print(f"Face encoded for image {i+1}")
             else:
-                print(f"Warning: No face detected in image {i+1}")
+                print(f"Warning: No usable face detected in image {i+1}")
         
         return encode_list
+
+    def file_hash(self, path):
+        """Hash file contents using SHA-256"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(65536), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def load_store(self):
+        """Load the encoding store as ({user_id: encoding}, {user_id: hash})"""
+        store = {}
+        hashes = {}
+
+        encodings_data = self.load_encodings(quiet=True)
+        if encodings_data:
+            encode_list_known, models_ids = encodings_data
+            store = dict(zip(models_ids, encode_list_known))
+
+        try:
+            with open(self.hashes_file, 'rb') as file:
+                hashes = pickle.load(file)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading encoding hashes: {str(e)}")
+
+        return store, hashes
+
+    def save_store(self, store, hashes):
+        """Write the encoding store and its content hashes"""
+        models_ids = list(store.keys())
+        encode_list_known = [store[user_id] for user_id in models_ids]
+
+        write_gallery(self.encodings_file, encode_list_known, models_ids)
+        self._atomic_dump(hashes, self.hashes_file)
+
+    def _atomic_dump(self, data, path):
+        """Pickle data to a temp file and move it into place"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(data, file)
+        os.replace(tmp_path, path)
+
+    def add_encoding(self, user_id, encoding, content_hash=None):
+        """Add or replace one user's encoding without touching the others"""
+        store, hashes = self.load_store()
+        store[user_id] = encoding
+        if content_hash:
+            hashes[user_id] = content_hash
+        else:
+            hashes.pop(user_id, None)
+        self.save_store(store, hashes)
+
+    def remove_encoding(self, user_id):
+        """Remove one user's encoding, returns False if it was not stored"""
+        store, hashes = self.load_store()
+        if user_id not in store:
+            return False
+        del store[user_id]
+        hashes.pop(user_id, None)
+        self.save_store(store, hashes)
+        return True
     
     def add_new_person(self, image_path, user_id, name, email="", phone="", department=""):
         """Add a new person to the system"""
@@ -93,30 +244,42 @@ class EnhancedEncoder:
             if not face_locations:
                 return False, "No face detected in the image"
             
-            face_encodings = face_recognition.face_encodings(img_rgb, face_locations)
+            # Enroll the largest face, and only if it is good enough to match against later
+            face_location = max(face_locations, key=lambda box: box[2] - box[0])
+            passed, reason = self.quality_gate.check(img_rgb, face_location)
+            if not passed:
+                return False, f"Photo quality too low: {reason}. Please capture again."
+
+            face_encodings = face_recognition.face_encodings(img_rgb, [face_location])
             if not face_encodings:
                 return False, "Could not encode face"
             
+            # Add user to database first, so an existing user's image is never overwritten
+            if not self.db_manager.add_user(user_id, name):
+                return False, "User ID already exists"
+            
             # Save image to modes folder
-            modes_folder = 'img/Modes'
+            modes_folder = self.modes_folder
             if not os.path.exists(modes_folder):
                 os.makedirs(modes_folder)
             
             # Save image with user_id as filename
             img_filename = f"{user_id}.jpg"
             img_save_path = os.path.join(modes_folder, img_filename)
-            cv2.imwrite(img_save_path, img)
-            
-            # Add user to database
-            if self.db_manager.add_user(user_id, name, email, phone, department):
-                # Regenerate encodings
-                self.generate_encoded_images()
-                return True, "Person added successfully"
-            else:
-                # Remove image if database insertion failed
+            try:
+                if not cv2.imwrite(img_save_path, img):
+                    raise IOError(f"Could not save image to {img_save_path}")
+                
+                # Store only this person's encoding
+                self.add_encoding(user_id, face_encodings[0], self.file_hash(img_save_path))
+            except Exception:
+                # Leave neither a user without an encoding nor a stray image behind
+                self.db_manager.delete_user(user_id)
                 if os.path.exists(img_save_path):
                     os.remove(img_save_path)
-                return False, "User ID already exists"
+                raise
+            
+            return True, "Person added successfully"
             
         except Exception as e:
             return False, f"Error adding person: {str(e)}"
@@ -128,30 +291,56 @@ class EnhancedEncoder:
             self.db_manager.delete_user(user_id)
             
             # Remove image file
-            img_path = os.path.join('img/Modes', f"{user_id}.jpg")
+            img_path = os.path.join(self.modes_folder, f"{user_id}.jpg")
             if os.path.exists(img_path):
                 os.remove(img_path)
             
-            # Regenerate encodings
-            self.generate_encoded_images()
+            # Drop only this person's encoding
+            self.remove_encoding(user_id)
             return True, "Person removed successfully"
         
         except Exception as e:
             return False, f"Error removing person: {str(e)}"
     
-    def load_encodings(self):
-        """Load encodings from file"""
+    def load_gallery_file(self, quiet=False):
+        """Open the encodings file as a memory-mapped GalleryFile, or None.
+
+        A legacy pickle file is converted on first load; one that cannot be
+        converted is left in place and the encodings must be regenerated.
+        """
         try:
-            with open(self.encodings_file, 'rb') as file:
-                encode_list_known_with_ids = pickle.load(file)
-            return encode_list_known_with_ids
-        except FileNotFoundError:
-            print("Encodings file not found. Please generate encodings first.")
-            return None
+            if not os.path.exists(self.encodings_file) and os.path.exists(self.legacy_encodings_file):
+                print(f"Migrating {self.legacy_encodings_file} to {self.encodings_file}")
+                try:
+                    convert_pickle(self.legacy_encodings_file, self.encodings_file)
+                except ValueError as e:
+                    print(f"Error migrating encodings: {str(e)}")
+                    return None
+
+            gallery = open_gallery(self.encodings_file)
+            if gallery is None and not quiet:
+                print("Encodings file not found. Please generate encodings first.")
+            return gallery
         except Exception as e:
             print(f"Error loading encodings: {str(e)}")
             return None
 
+    def load_encodings(self, quiet=False):
+        """Load encodings from file.
+
+        Returns [encodings, ids] where encodings is a read-only (N, 128)
+        float32 array mapped from the gallery file.
+        """
+        gallery = self.load_gallery_file(quiet)
+        if gallery is None:
+            return None
+        return [gallery.encodings, gallery.ids]
+
 if __name__ == "__main__":
-    encoder = EnhancedEncoder()
+    parser = argparse.ArgumentParser(description="Generate face encodings for img/Modes")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of encoding processes (default: CPU count)")
+    args = parser.parse_args()
+
+    encoder = EnhancedEncoder(workers=args.workers)
     encoder.generate_encoded_images()
\ No newline at end of file
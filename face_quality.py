@@ -0,0 +1,95 @@
+from collections import Counter
+import cv2
+import face_recognition
+
+class FaceQualityGate:
+    """Scores a detected face before it is worth the cost of an encoding.
+
+    Checks run cheapest first and stop at the first failure: face size
+    (box height in pixels), brightness (mean grey level), sharpness
+    (variance of the Laplacian on the face resized to sharpness_width
+    pixels, so it does not depend on distance) and yaw estimated from the
+    5-point landmarks (nose offset from the eye midpoint over the eye
+    distance, 0 when facing the camera). A threshold set to None is not
+    checked. Images are RGB, boxes (top, right, bottom, left).
+    """
+
+    def __init__(self, min_face_size=40, min_brightness=40.0, max_brightness=220.0,
+                 min_sharpness=30.0, max_yaw=0.45, sharpness_width=100):
+        self.min_face_size = min_face_size
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.min_sharpness = min_sharpness
+        self.max_yaw = max_yaw
+        self.sharpness_width = sharpness_width
+
+        self.checked = 0
+        self.skipped = 0
+        self.skip_reasons = Counter()
+
+    def _yaw(self, rgb_image, box):
+        landmarks = face_recognition.face_landmarks(rgb_image, [box], model="small")
+        if not landmarks:
+            return None
+        points = landmarks[0]
+        left_eye = sum(x for x, _ in points['left_eye']) / len(points['left_eye'])
+        right_eye = sum(x for x, _ in points['right_eye']) / len(points['right_eye'])
+        eye_distance = abs(right_eye - left_eye)
+        if eye_distance == 0:
+            return None
+        return abs(points['nose_tip'][0][0] - (left_eye + right_eye) / 2) / eye_distance
+
+    def score(self, rgb_image, box):
+        """Return (passed, scores, reason) for one face; reason is None when it passed"""
+        top, right, bottom, left = box
+        height, width = rgb_image.shape[:2]
+        top, bottom = max(0, top), min(height, bottom)
+        left, right = max(0, left), min(width, right)
+        scores = {'size': bottom - top}
+
+        if bottom <= top or right <= left:
+            return False, scores, "face outside the image"
+        if self.min_face_size is not None and scores['size'] < self.min_face_size:
+            return False, scores, f"face too small ({scores['size']} < {self.min_face_size} px)"
+
+        gray = cv2.cvtColor(rgb_image[top:bottom, left:right], cv2.COLOR_RGB2GRAY)
+        scores['brightness'] = float(gray.mean())
+        if self.min_brightness is not None and scores['brightness'] < self.min_brightness:
+            return False, scores, f"too dark (brightness {scores['brightness']:.0f} < {self.min_brightness:.0f})"
+        if self.max_brightness is not None and scores['brightness'] > self.max_brightness:
+            return False, scores, f"too bright (brightness {scores['brightness']:.0f} > {self.max_brightness:.0f})"
+
+        if self.min_sharpness is not None:
+            scale = self.sharpness_width / float(gray.shape[1])
+            resized = cv2.resize(gray, (0, 0), None, scale, scale,
+                                 interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+            scores['sharpness'] = float(cv2.Laplacian(resized, cv2.CV_64F).var())
+            if scores['sharpness'] < self.min_sharpness:
+                return False, scores, f"too blurry (sharpness {scores['sharpness']:.0f} < {self.min_sharpness:.0f})"
+
+        if self.max_yaw is not None:
+            scores['yaw'] = self._yaw(rgb_image, (top, right, bottom, left))
+            if scores['yaw'] is None:
+                return False, scores, "no facial landmarks found"
+            if scores['yaw'] > self.max_yaw:
+                return False, scores, f"face turned away (yaw {scores['yaw']:.2f} > {self.max_yaw:.2f})"
+
+        return True, scores, None
+
+    def check(self, rgb_image, box):
+        """Score a face and count the result, returns (passed, reason)"""
+        passed, _, reason = self.score(rgb_image, box)
+        self.checked += 1
+        if not passed:
+            self.skipped += 1
+            self.skip_reasons[reason.split(' (')[0]] += 1
+        return passed, reason
+
+    def stats(self):
+        """Return faces checked and skipped, the skip rate and the skips per reason"""
+        return {
+            'checked': self.checked,
+            'skipped': self.skipped,
+            'skip_rate': self.skipped / self.checked if self.checked else 0.0,
+            'reasons': dict(self.skip_reasons),
+        }
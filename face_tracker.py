@@ -0,0 +1,99 @@
+import time
+
+def box_iou(box_a, box_b):
+    """Intersection over union of two (top, right, bottom, left) boxes"""
+    top = max(box_a[0], box_b[0])
+    right = min(box_a[1], box_b[1])
+    bottom = min(box_a[2], box_b[2])
+    left = max(box_a[3], box_b[3])
+
+    intersection = max(0, right - left) * max(0, bottom - top)
+    if intersection == 0:
+        return 0.0
+
+    area_a = (box_a[1] - box_a[3]) * (box_a[2] - box_a[0])
+    area_b = (box_b[1] - box_b[3]) * (box_b[2] - box_b[0])
+    return intersection / float(area_a + area_b - intersection)
+
+class Track:
+    """One face followed across frames, with the identity last verified for it"""
+
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = box
+        self.missed = 0
+        self.user_id = None     # None until identified, or when the face is unknown
+        self.distance = None
+        self.verified_at = None
+
+    @property
+    def confidence(self):
+        return None if self.distance is None else 1 - self.distance
+
+    def identify(self, user_id, distance, now=None):
+        """Record the result of a full encode + match for this track"""
+        self.user_id = user_id
+        self.distance = distance
+        self.verified_at = now if now is not None else time.time()
+
+class FaceTracker:
+    """Greedy IoU tracker over the face boxes of consecutive frames.
+
+    Each detection is matched to the live track it overlaps most (above
+    iou_threshold). A track only needs a fresh encoding when it is new or
+    its identity is older than reverify_interval seconds; in between it
+    carries its identity and confidence forward.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=5, reverify_interval=1.0):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.reverify_interval = reverify_interval
+        self.tracks = []
+        self._next_id = 1
+
+    def reset(self):
+        """Drop all tracks, forcing every face to be identified again"""
+        self.tracks = []
+
+    def update(self, boxes):
+        """Associate this frame's boxes with tracks, returns one track per box"""
+        pairs = []
+        for t, track in enumerate(self.tracks):
+            for b, box in enumerate(boxes):
+                iou = box_iou(track.box, box)
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, t, b))
+
+        # Best overlaps first, each track and box used once
+        assigned = [None] * len(boxes)
+        used_tracks = set()
+        for iou, t, b in sorted(pairs, reverse=True):
+            if t in used_tracks or assigned[b] is not None:
+                continue
+            used_tracks.add(t)
+            assigned[b] = self.tracks[t]
+
+        for t, track in enumerate(self.tracks):
+            if t not in used_tracks:
+                track.missed += 1
+
+        for b, box in enumerate(boxes):
+            track = assigned[b]
+            if track is None:
+                track = Track(self._next_id, box)
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[b] = track
+            track.box = box
+            track.missed = 0
+
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+        return assigned
+
+    def needs_verification(self, track, now=None):
+        """True if the track has no identity yet or it is due for re-checking"""
+        if track.verified_at is None:
+            return True
+        now = now if now is not None else time.time()
+        return now - track.verified_at >= self.reverify_interval
@@ -0,0 +1,38 @@
+import threading
+from collections import deque
+
+class DropOldestQueue:
+    """Bounded FIFO between pipeline stages whose put never blocks.
+
+    When the queue is full the oldest item is discarded, so a slow consumer
+    always gets the newest frames instead of stale ones piling up.
+    """
+
+    def __init__(self, maxsize=1):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        """Append item, dropping the oldest one if the queue is full"""
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Pop the oldest item, waiting up to timeout; returns None on timeout"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,153 @@
+import numpy as np
+from ann_index import IVFIndex
+
+class Gallery:
+    """Known face encodings held as one contiguous float32 matrix.
+
+    Squared norms of every row are precomputed, so matching all faces of a
+    frame is a single matrix product:
+        |q - g|^2 = |q|^2 + |g|^2 - 2 q.g
+
+    Galleries larger than exact_search_limit are searched through an IVF
+    index instead, built lazily and invalidated by add/remove.
+    """
+
+    def __init__(self, encodings=None, ids=None, dim=128, exact_search_limit=20000, n_probe=8):
+        self.dim = dim
+        self.exact_search_limit = exact_search_limit
+        self.n_probe = n_probe
+        self._ann = None
+        self.load(encodings if encodings is not None else [], ids or [])
+
+    def load(self, encodings, ids):
+        """Replace the gallery contents.
+
+        A contiguous float32 matrix (such as a memory-mapped gallery file)
+        is used as is, without copying.
+        """
+        matrix = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        if not matrix.flags['C_CONTIGUOUS']:
+            matrix = np.ascontiguousarray(matrix)
+        if len(matrix) != len(ids):
+            raise ValueError(f"Got {len(matrix)} encodings for {len(ids)} ids")
+
+        self._matrix = matrix
+        self._owned = False  # Borrowed from the caller until add/remove make a private copy
+        self._norms = np.einsum('ij,ij->i', matrix, matrix)
+        self._size = len(matrix)
+        self.ids = list(ids)
+        self._index = {user_id: i for i, user_id in enumerate(self.ids)}
+        self._ann = None
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, user_id):
+        return user_id in self._index
+
+    @property
+    def encodings(self):
+        """The (N, dim) matrix of stored encodings"""
+        return self._matrix[:self._size]
+
+    def _reserve(self, capacity):
+        """Grow the private buffer so it can hold at least capacity rows"""
+        if capacity <= len(self._matrix) and self._owned:
+            return
+        capacity = max(capacity, 2 * len(self._matrix), 16)
+        matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        norms = np.empty(capacity, dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        norms[:self._size] = self._norms[:self._size]
+        self._matrix, self._norms = matrix, norms
+        self._owned = True
+
+    def add(self, user_id, encoding):
+        """Add or replace one encoding"""
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        if user_id in self._index:
+            row = self._index[user_id]
+            self._reserve(len(self._matrix))
+        else:
+            row = self._size
+            self._reserve(self._size + 1)
+            self._size += 1
+            self.ids.append(user_id)
+            self._index[user_id] = row
+
+        self._matrix[row] = encoding
+        self._norms[row] = encoding @ encoding
+        self._ann = None
+
+    def remove(self, user_id):
+        """Remove one encoding, returns False if user_id is not stored"""
+        row = self._index.pop(user_id, None)
+        if row is None:
+            return False
+
+        # Move the last row into the hole to keep the matrix dense
+        self._reserve(len(self._matrix))
+        last = self._size - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._norms[row] = self._norms[last]
+            self.ids[row] = self.ids[last]
+            self._index[self.ids[row]] = row
+        self.ids.pop()
+        self._size = last
+        self._ann = None
+        return True
+
+    def distances(self, face_encodings):
+        """Return the (faces, N) matrix of euclidean distances"""
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.dim)
+        matrix = self._matrix[:self._size]
+        sq = (np.einsum('ij,ij->i', queries, queries)[:, None]
+              + self._norms[:self._size][None, :]
+              - 2.0 * (queries @ matrix.T))
+        np.maximum(sq, 0.0, out=sq)
+        return np.sqrt(sq, out=sq)
+
+    def ann_index(self):
+        """Return the IVF index over the current rows, building it if needed"""
+        if self._ann is None:
+            self._ann = IVFIndex(self._matrix[:self._size], self._norms[:self._size],
+                                 n_probe=self.n_probe)
+        return self._ann
+
+    def search(self, face_encodings, k=1, exact=None):
+        """Return (indices, distances) of the k nearest rows for each face.
+
+        Both arrays have shape (faces, min(k, N)) and are sorted by distance.
+        Approximate search may pad a row with index -1 and distance inf.
+        exact forces (True) or forbids (False) the brute-force scan; by
+        default it is used up to exact_search_limit rows.
+        """
+        if exact is None:
+            exact = self._size <= self.exact_search_limit
+        k = min(k, self._size)
+
+        if not exact and k > 0:
+            return self.ann_index().search(face_encodings, k)
+
+        distances = self.distances(face_encodings)
+        if k == 0:
+            empty = np.empty((len(distances), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        if k < self._size:
+            top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(self._size), distances.shape)
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_distances, order, axis=1)
+
+    def match(self, face_encodings, k=1):
+        """Return, for each face, a list of up to k (user_id, distance) pairs"""
+        if len(face_encodings) == 0:
+            return []
+
+        indices, distances = self.search(face_encodings, k)
+        return [[(self.ids[i], float(d)) for i, d in zip(row_idx, row_dist) if i >= 0]
+                for row_idx, row_dist in zip(indices, distances)]
@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import mmap
+import time
+import pickle
+import struct
+import numpy as np
+
+# On-disk layout (little endian):
+#   [0, 64)           header: magic, format version, dim, count, ids offset, created_at
+#   [64, ids_offset)  float32 matrix, count rows of dim values
+#   [ids_offset, EOF) UTF-8 JSON list of ids, one per matrix row
+MAGIC = b'FGAL'
+FORMAT_VERSION = 1
+ENCODING_DIM = 128
+HEADER = struct.Struct('<4sIIQQd')
+DATA_OFFSET = 64
+
+# Windows refuses to replace a file while any process has it mapped, which
+# would block every write_gallery while a recognizer runs; read it instead
+USE_MMAP = os.name != 'nt'
+REPLACE_ATTEMPTS = 50
+
+class GalleryFile:
+    """Read-only, memory-mapped view of a gallery file.
+
+    The encodings matrix is a numpy view straight onto the mapped pages, so
+    opening is zero-copy and every process mapping the same file shares them.
+    Without USE_MMAP (on Windows) the file is read into memory and closed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            if USE_MMAP:
+                self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._buffer = file.read()
+
+        magic, version, dim, count, ids_offset, created_at = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a gallery file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported gallery format version {version}")
+
+        self.version = version
+        self.dim = dim
+        self.created_at = created_at
+        self.encodings = np.frombuffer(self._buffer, dtype='<f4', count=count * dim,
+                                       offset=DATA_OFFSET).reshape(count, dim)
+        self.ids = json.loads(self._buffer[ids_offset:].decode('utf-8'))
+
+        if len(self.ids) != count:
+            raise ValueError(f"{path} is corrupt: {count} encodings but {len(self.ids)} ids")
+
+    def __len__(self):
+        return len(self.ids)
+
+def write_gallery(path, encodings, ids):
+    """Write encodings and their ids to path, replacing it atomically"""
+    ids = [str(user_id) for user_id in ids]
+    matrix = np.ascontiguousarray(np.asarray(encodings, dtype='<f4').reshape(-1, ENCODING_DIM))
+    if len(matrix) != len(ids):
+        raise ValueError(f"Got {len(matrix)} encodings for {len(ids)} ids")
+
+    ids_offset = DATA_OFFSET + matrix.nbytes
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, ENCODING_DIM, len(ids), ids_offset, time.time())
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(header.ljust(DATA_OFFSET, b'\0'))
+        file.write(matrix.tobytes())
+        file.write(json.dumps(ids).encode('utf-8'))
+        file.flush()
+        os.fsync(file.fileno())
+
+    # Readers that already mapped the old file keep seeing it until they reopen
+    for attempt in range(REPLACE_ATTEMPTS):
+        try:
+            os.replace(tmp_path, path)
+            break
+        except PermissionError:
+            # Windows: a reader has the file open for a moment
+            if attempt == REPLACE_ATTEMPTS - 1:
+                raise
+            time.sleep(0.02)
+
+def read_created_at(path):
+    """Return the created_at stamp from a gallery file header, None if missing or not a gallery"""
+    try:
+        with open(path, 'rb') as file:
+            header = file.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    magic, _, _, _, _, created_at = HEADER.unpack(header)
+    return created_at if magic == MAGIC else None
+
+def open_gallery(path):
+    """Open a gallery file, returns None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    return GalleryFile(path)
+
+def convert_pickle(pickle_path, gallery_path):
+    """Migrate a pickled [encodings, ids] file to the binary gallery format"""
+    with open(pickle_path, 'rb') as file:
+        encode_list_known, models_ids = pickle.load(file)
+
+    if len(encode_list_known) != len(models_ids):
+        # Older versions kept the id of every image, even those where no face was found,
+        # so there is no telling which encoding belongs to which id
+        raise ValueError(f"{pickle_path} has {len(encode_list_known)} encodings for {len(models_ids)} ids "
+                         f"and cannot be converted, please regenerate the encodings")
+
+    write_gallery(gallery_path, encode_list_known, models_ids)
+    print(f"Converted {len(models_ids)} encodings from {pickle_path} to {gallery_path}")
+    return len(models_ids)
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python gallery_store.py <EncodedImages.p> [EncodedImages.gallery]")
+        sys.exit(1)
+
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) == 3 else os.path.splitext(source)[0] + ".gallery"
+    convert_pickle(source, target)
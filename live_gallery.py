@@ -0,0 +1,110 @@
+import os
+import time
+import threading
+from gallery import Gallery
+from gallery_store import read_created_at
+
+class GallerySnapshot:
+    """One immutable generation of the gallery: the matcher plus where it came from"""
+
+    def __init__(self, gallery, version, created_at, loaded_at):
+        self.gallery = gallery
+        self.version = version        # Increases by one on every swap
+        self.created_at = created_at  # When the on-disk store was written, None without a file
+        self.loaded_at = loaded_at
+
+    def age(self, now=None):
+        """Seconds since the gallery contents were written (or loaded, without a file)"""
+        now = now if now is not None else time.time()
+        return now - (self.created_at or self.loaded_at)
+
+class LiveGallery:
+    """Double-buffered gallery that reloads without pausing recognition.
+
+    A new Gallery (and its ANN index, for large galleries) is built off to
+    the side and published by replacing one reference, so a reader that
+    takes current once per frame always sees ids and encodings from the
+    same generation. A watcher thread checks the encoder's gallery file
+    every check_interval seconds and reloads when its header stamp changes.
+    """
+
+    def __init__(self, encoder, check_interval=2.0, on_swap=None):
+        self.encoder = encoder
+        self.check_interval = check_interval
+        self.on_swap = on_swap
+        self.current = GallerySnapshot(Gallery(), 0, None, time.time())
+
+        self._reload_lock = threading.Lock()  # One build at a time; readers never take it
+        self._file_state = None
+        self._stop = threading.Event()
+        self._watcher = None
+
+    @property
+    def version(self):
+        return self.current.version
+
+    def age(self):
+        return self.current.age()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.encoder.encodings_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def reload(self, force=False, quiet=False):
+        """Load the store into a new snapshot and swap it in, returns True if swapped.
+
+        Without force nothing is rebuilt when the file header stamp matches
+        the current snapshot, e.g. when a manual reload already picked it up.
+        """
+        with self._reload_lock:
+            self._file_state = self._stat()
+            created_at = read_created_at(self.encoder.encodings_file)
+            if not force and created_at is not None and created_at == self.current.created_at:
+                return False
+
+            gallery_file = self.encoder.load_gallery_file(quiet=quiet)
+            if gallery_file is None:
+                if not quiet:
+                    print("No encodings loaded. Please generate encodings first.")
+                return False
+
+            gallery = Gallery(gallery_file.encodings, gallery_file.ids)
+            # Build the ANN index now rather than on the first frame that uses it
+            if len(gallery) > gallery.exact_search_limit:
+                gallery.ann_index()
+
+            snapshot = GallerySnapshot(gallery, self.current.version + 1, gallery_file.created_at, time.time())
+            self.current = snapshot
+            print(f"Loaded {len(gallery)} face encodings (gallery version {snapshot.version})")
+
+        if self.on_swap is not None:
+            self.on_swap(snapshot)
+        return True
+
+    def reload_async(self, force=False):
+        """Reload on a background thread, the current snapshot stays in use meanwhile"""
+        threading.Thread(target=self.reload, args=(force,), name="gallery-reload", daemon=True).start()
+
+    def _watch(self):
+        while not self._stop.wait(self.check_interval):
+            state = self._stat()
+            if state is not None and state != self._file_state:
+                try:
+                    self.reload(quiet=True)
+                except Exception as e:
+                    print(f"Error reloading encodings: {str(e)}")
+
+    def start_watching(self):
+        """Reload automatically whenever the on-disk store changes"""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="gallery-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=2)
+            self._watcher = None
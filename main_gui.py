@@ -1,14 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
-from database_manager import DatabaseManager
-from run_face_recognition import FaceRecognitionSystem
-from enhanced_encoder import EnhancedEncoder
+import bisect
+from services import get_db_manager, get_encoder, get_face_system
 import os
-import cv2
 import time
-from PIL import Image, ImageTk
-import numpy as np
+from datetime import datetime, timedelta
 
 class MainGUI:
     def __init__(self):
@@ -17,12 +14,59 @@ class MainGUI:
         self.root.geometry("800x600")
         self.root.configure(bg='#2c3e50')
         
-        self.db_manager = DatabaseManager()
-        self.face_system = FaceRecognitionSystem()
-        self.encoder = EnhancedEncoder()
+        self.db_manager = get_db_manager()
+        self.face_system = None  # Shared services, created by the background warm-up
+        self.encoder = None
+        self.ready = threading.Event()
+        self.warm_up_error = None
         self.captured_image = None  # Initialize captured_image
+        self.admin_window = None
+        self.clearing_logs = False
+        
+        # Roll access logs past the retention period into the archive
+        threading.Thread(target=self.db_manager.archive_access_logs, daemon=True).start()
         
         self.create_main_interface()
+        
+        # Load OpenCV, the dlib models and the gallery once the window is on screen
+        self.root.after(100, self.start_warm_up)
+    
+    def start_warm_up(self):
+        """Create the face recognition services on a background thread"""
+        started = time.time()
+        
+        def warm_up():
+            try:
+                self.encoder = get_encoder()
+                self.face_system = get_face_system()
+            except Exception as e:
+                self.warm_up_error = str(e)
+            self.warm_up_time = time.time() - started
+            self.ready.set()
+        
+        threading.Thread(target=warm_up, daemon=True).start()
+        self.check_ready()
+    
+    def check_ready(self):
+        """Poll the warm-up from the Tk thread and update the readiness indicator"""
+        if not self.ready.is_set():
+            self.root.after(100, self.check_ready)
+            return
+        
+        if self.warm_up_error:
+            self.status_var.set(f"Error loading face recognition: {self.warm_up_error}")
+        else:
+            self.status_var.set(f"Ready (face recognition loaded in {self.warm_up_time:.1f}s)")
+            self.check_btn.config(state='normal')
+    
+    def require_ready(self, parent=None):
+        """Return True if the face recognition services are loaded, tell the user otherwise"""
+        if self.ready.is_set() and self.face_system is not None:
+            return True
+        message = (f"Face recognition failed to load: {self.warm_up_error}" if self.warm_up_error
+                   else "Face recognition is still loading, please try again in a moment.")
+        messagebox.showinfo("Please wait", message, parent=parent or self.root)
+        return False
     
     def create_main_interface(self):
         """Create the main interface with LOGIN and CHECK buttons"""
@@ -51,14 +95,15 @@ class MainGUI:
         login_btn.pack(pady=20)
         
         # CHECK button
-        check_btn = tk.Button(button_frame, text="CHECK", font=("Arial", 16, "bold"),
-                             bg='#e74c3c', fg='white', width=15, height=2,
-                             command=self.start_face_check)
-        check_btn.pack(pady=20)
+        self.check_btn = tk.Button(button_frame, text="CHECK", font=("Arial", 16, "bold"),
+                                   bg='#e74c3c', fg='white', width=15, height=2,
+                                   command=self.start_face_check,
+                                   state='normal' if self.ready.is_set() else 'disabled')
+        self.check_btn.pack(pady=20)
         
         # Status bar
         self.status_var = tk.StringVar()
-        self.status_var.set("Ready")
+        self.status_var.set("Ready" if self.ready.is_set() else "Loading face recognition models...")
         status_bar = tk.Label(self.root, textvariable=self.status_var, 
                              font=("Arial", 10), fg='#bdc3c7', bg='#34495e')
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
@@ -210,6 +255,30 @@ class MainGUI:
                                   command=self.clear_logs)
         clear_logs_btn.pack(side='left', padx=5)
         
+        # Filters, applied by the database query
+        filter_frame = tk.Frame(parent, bg='#ecf0f1')
+        filter_frame.pack(fill='x', padx=10, pady=5)
+        
+        tk.Label(filter_frame, text="User ID:", bg='#ecf0f1').pack(side='left')
+        self.log_user_var = tk.StringVar()
+        tk.Entry(filter_frame, textvariable=self.log_user_var, width=12).pack(side='left', padx=5)
+        
+        tk.Label(filter_frame, text="Status:", bg='#ecf0f1').pack(side='left')
+        self.log_status_var = tk.StringVar(value="All")
+        ttk.Combobox(filter_frame, textvariable=self.log_status_var, values=("All", "GRANTED", "DENIED"),
+                     state='readonly', width=9).pack(side='left', padx=5)
+        
+        tk.Label(filter_frame, text="From (UTC):", bg='#ecf0f1').pack(side='left')
+        self.log_since_var = tk.StringVar()
+        tk.Entry(filter_frame, textvariable=self.log_since_var, width=16).pack(side='left', padx=5)
+        
+        tk.Label(filter_frame, text="To:", bg='#ecf0f1').pack(side='left')
+        self.log_until_var = tk.StringVar()
+        tk.Entry(filter_frame, textvariable=self.log_until_var, width=16).pack(side='left', padx=5)
+        
+        tk.Button(filter_frame, text="Apply", bg='#3498db', fg='white',
+                  command=self.apply_log_filters).pack(side='left', padx=5)
+        
         # Logs list
         log_columns = ('ID', 'User ID', 'Name', 'Access Time', 'Status')
         self.logs_tree = ttk.Treeview(parent, columns=log_columns, show='headings')
@@ -219,16 +288,29 @@ class MainGUI:
             self.logs_tree.heading(col, text=col)
             self.logs_tree.column(col, width=120)
         
-        # Scrollbar for logs
+        # Scrollbar for logs, the next page is loaded when it nears the bottom
         logs_scrollbar = ttk.Scrollbar(parent, orient='vertical', command=self.logs_tree.yview)
-        self.logs_tree.configure(yscrollcommand=logs_scrollbar.set)
+        
+        def on_logs_scroll(first, last):
+            logs_scrollbar.set(first, last)
+            if float(last) > 0.9:
+                self.load_more_logs()
+        
+        self.logs_tree.configure(yscrollcommand=on_logs_scroll)
         
         # Pack logs treeview and scrollbar
         self.logs_tree.pack(side='left', fill='both', expand=True, padx=10, pady=5)
         logs_scrollbar.pack(side='right', fill='y')
         
         # Load logs
-        self.refresh_logs_list()
+        self.log_filters = {}
+        self.logs_page_size = 200
+        self.reset_logs_list()
+        
+        # Pick up new logs in the background, replacing the loop of a previously opened panel
+        if getattr(self, 'logs_job', None):
+            self.root.after_cancel(self.logs_job)
+        self.auto_refresh_logs()
     
     def create_settings_tab(self, parent):
         """Create the settings tab"""
@@ -260,14 +342,18 @@ class MainGUI:
         info_frame.pack(fill='x', padx=10, pady=10)
         
         # System info labels
-        self.info_text = tk.Text(info_frame, height=10, width=80, state='disabled')
+        self.info_text = tk.Text(info_frame, height=24, width=80, state='disabled', font=("Courier", 10))
         self.info_text.pack(pady=10)
         
-        # Update system info
+        # Update system info, replacing the refresh loop of a previously opened panel
+        if getattr(self, 'info_job', None):
+            self.root.after_cancel(self.info_job)
         self.update_system_info()
     
     def start_face_check(self):
         """Start face recognition checking"""
+        if not self.require_ready():
+            return
         self.root.withdraw()  # Hide main window
         
         def camera_thread():
@@ -338,6 +424,11 @@ class MainGUI:
         cancel_btn.pack(side='left', padx=10)
     
     def save_user(self):
+        import cv2
+        
+        if not self.require_ready(self.add_window):
+            return
+        
         name = self.entries['name'].get().strip()
         phone = self.entries['phone'].get().strip()
 
@@ -446,19 +537,32 @@ class MainGUI:
         cancel_btn.pack(side='left', padx=10)
     
     def start_camera_capture(self):
+        import numpy as np
+        from PIL import Image, ImageTk
+        from camera_manager import get_camera
+        
+        self.close_camera()  # Opening the camera again replaces the previous preview
         self.camera_window = tk.Toplevel(self.add_window)
         self.camera_window.title("Camera Capture - Press 'C' to Capture")
         self.camera_window.attributes('-topmost', True)  # Ensure it's on top
 
-        # Create video capture
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
+        # Subscribe to the shared camera, which may already be open and warmed up
+        self.camera = get_camera(0)
+        self.camera_frames = self.camera.subscribe()
+        if self.camera_frames is None:
             messagebox.showerror("Error", "Could not open camera", parent=self.add_window)
             self.camera_window.destroy()
             return
-
-        # Create label for video feed
-        self.video_label = tk.Label(self.camera_window)
+        # Closing the add user dialog destroys this window as well, without close_camera
+        self.camera_window.bind('<Destroy>', self.on_camera_window_destroyed)
+
+        # Create label for video feed, showing one PhotoImage updated in place
+        self.preview_size = (640, 480)
+        self.preview_bgr = np.empty((self.preview_size[1], self.preview_size[0], 3), dtype=np.uint8)
+        self.preview_rgb = np.empty_like(self.preview_bgr)
+        self.preview_image = Image.new('RGB', self.preview_size)
+        self.preview_photo = ImageTk.PhotoImage(self.preview_image)
+        self.video_label = tk.Label(self.camera_window, image=self.preview_photo)
         self.video_label.pack()
 
         # Start video feed
@@ -474,58 +578,69 @@ class MainGUI:
     
     def update_camera_feed(self):
         """Update the camera feed in the GUI"""
-        if hasattr(self, 'cap') and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if ret:
-                # Convert to RGB and resize for display
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame_rgb = cv2.resize(frame_rgb, (640, 480))
-
-                # Convert to PhotoImage
-                img = Image.fromarray(frame_rgb)
-                imgtk = ImageTk.PhotoImage(image=img)
+        import cv2
+        
+        if not (hasattr(self, 'camera_window') and self.camera_window.winfo_exists()):
+            return
 
-                # Update label
-                self.video_label.imgtk = imgtk
-                self.video_label.configure(image=imgtk)
+        # The camera thread queues only the newest frame; convert it into the same buffers every time
+        item = self.camera_frames.get(timeout=0)
+        if item is not None:
+            cv2.resize(item[0], self.preview_size, dst=self.preview_bgr)
+            cv2.cvtColor(self.preview_bgr, cv2.COLOR_BGR2RGB, dst=self.preview_rgb)
+            self.preview_image.frombytes(self.preview_rgb)
+            self.preview_photo.paste(self.preview_image)
 
-            # Schedule next update if window still exists
-            if hasattr(self, 'camera_window') and self.camera_window.winfo_exists():
-                self.camera_window.after(10, self.update_camera_feed)
+        # Poll at about the display refresh rate (60 Hz)
+        self.camera_window.after(16, self.update_camera_feed)
     
     def capture_image(self, event=None):
         """Capture the current frame from camera"""
-        if hasattr(self, 'cap') and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if ret:
-                self.captured_image = frame.copy()
-                self.close_camera()
-
-                # Show preview in main window
-                preview_img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                preview_img = cv2.resize(preview_img, (200, 200))
-                img = Image.fromarray(preview_img)
-                imgtk = ImageTk.PhotoImage(image=img)
-
-                self.image_preview.imgtk = imgtk
-                self.image_preview.configure(image=imgtk)
-
-                # Show success message
-                messagebox.showinfo("Success", "Image captured successfully!", parent=self.add_window)
+        import cv2
+        from PIL import Image, ImageTk
+        
+        latest = self.camera.latest_frame()
+        if latest is not None:
+            frame = latest[0]
+            self.captured_image = frame.copy()
+            self.close_camera()
+
+            # Show preview in main window
+            preview_img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            preview_img = cv2.resize(preview_img, (200, 200))
+            img = Image.fromarray(preview_img)
+            imgtk = ImageTk.PhotoImage(image=img)
+
+            self.image_preview.imgtk = imgtk
+            self.image_preview.configure(image=imgtk)
+
+            # Show success message
+            messagebox.showinfo("Success", "Image captured successfully!", parent=self.add_window)
     
     def close_camera(self):
         """Close camera and cleanup"""
-        if hasattr(self, 'cap') and self.cap.isOpened():
-            self.cap.release()
+        # The device itself stays open for a while in case the camera is used again
+        if getattr(self, 'camera_frames', None) is not None:
+            self.camera_frames.close()
+            self.camera_frames = None
         if hasattr(self, 'camera_window') and self.camera_window.winfo_exists():
             self.camera_window.destroy()
 
+    def on_camera_window_destroyed(self, event):
+        """Drop the camera subscription however the preview window went away"""
+        # Children of the window report their own Destroy through this binding too
+        if event.widget is self.camera_window and self.camera_frames is not None:
+            self.camera_frames.close()
+            self.camera_frames = None
+
     def delete_user(self):
         """Delete selected user"""
         selected_item = self.users_tree.selection()
         if not selected_item:
             messagebox.showwarning("Selection Error", "Please select a user to delete", parent=self.admin_window)
             return
+        if not self.require_ready(self.admin_window):
+            return
         user_data = self.users_tree.item(selected_item)['values']
         user_id = user_data[1]
         name = user_data[2]
@@ -550,28 +665,150 @@ class MainGUI:
             display_data = (user[0], user[1], user[2], user[4], user[6], user[7])
             self.users_tree.insert('', 'end', values=display_data)
     
-    def refresh_logs_list(self):
-        """Refresh the access logs list"""
-        # Clear existing items
-        for item in self.logs_tree.get_children():
-            self.logs_tree.delete(item)
-        
-        # Load logs from database
-        logs = self.db_manager.get_access_logs()
+    def _insert_logs(self, logs):
+        """Add log rows to the tree at their place in (access_time, id) order, newest first"""
         for log in logs:
-            log_id, user_id, access_time, access_granted, name = log
+            log_id, user_id, access_time, access_granted, name = log[:5]
+            self.logs_max_id = max(self.logs_max_id, log_id)
+            if self.logs_tree.exists(log_id):
+                continue  # Already shown
+            
+            # Visits are logged with their start time, so a new row may belong below newer ones
+            key = (access_time, log_id)
+            position = len(self.logs_keys) - bisect.bisect_right(self.logs_keys, key)
+            bisect.insort(self.logs_keys, key)
+            
             status = "GRANTED" if access_granted else "DENIED"
             display_name = name if name else "Unknown"
-            self.logs_tree.insert('', 'end', values=(log_id, user_id, display_name, access_time, status))
+            self.logs_tree.insert('', position, iid=log_id,
+                                  values=(log_id, user_id, display_name, access_time, status))
+    
+    def reset_logs_list(self):
+        """Reload the access logs list from the newest page"""
+        self.logs_tree.delete(*self.logs_tree.get_children())
+        self.logs_keys = []  # (access_time, id) of the rows shown, ascending
+        self.logs_cursor = None
+        self.logs_max_id = 0
+        self.logs_exhausted = False
+        self.load_more_logs()
+    
+    def load_more_logs(self):
+        """Append the next (older) page of logs after the last loaded row"""
+        if self.logs_exhausted:
+            return
+        
+        logs = self.db_manager.get_access_logs_page(self.logs_cursor, self.logs_page_size, **self.log_filters)
+        if len(logs) < self.logs_page_size:
+            self.logs_exhausted = True
+        if logs:
+            self.logs_cursor = (logs[-1][2], logs[-1][0])
+            self._insert_logs(logs)
+    
+    def refresh_logs_list(self):
+        """Add the logs written since the last refresh at their place in the list"""
+        if not self.logs_max_id:
+            self.reset_logs_list()
+            return
+        
+        logs = self.db_manager.get_access_logs_page(None, self.logs_page_size, after_id=self.logs_max_id,
+                                                    **self.log_filters)
+        if len(logs) == self.logs_page_size:
+            # Too many new rows to splice in, start over from the newest page
+            self.reset_logs_list()
+            return
+        
+        if logs and not self.logs_exhausted:
+            # Rows older than the last loaded page come with load_more_logs, in order
+            self.logs_max_id = max(self.logs_max_id, max(log[0] for log in logs))
+            logs = [log for log in logs if (log[2], log[0]) > self.logs_cursor]
+        self._insert_logs(logs)
+    
+    def auto_refresh_logs(self):
+        """Refresh the logs list every few seconds while the admin panel is open"""
+        if not self.logs_tree.winfo_exists():
+            return
+        self.refresh_logs_list()
+        self.logs_job = self.root.after(5000, self.auto_refresh_logs)
+    
+    def _parse_log_time(self, text, end=False):
+        """Parse a 'YYYY-MM-DD[ HH:MM]' filter into a UTC timestamp string, None if empty.
+        
+        A date alone as end of the range includes that whole day.
+        """
+        text = text.strip()
+        if not text:
+            return None
+        for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+            try:
+                value = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            if end and fmt == '%Y-%m-%d':
+                value += timedelta(days=1)
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        raise ValueError(f"Invalid date '{text}', use YYYY-MM-DD or YYYY-MM-DD HH:MM")
+    
+    def apply_log_filters(self):
+        """Reload the logs list with the user, status and time range filters"""
+        try:
+            since = self._parse_log_time(self.log_since_var.get())
+            until = self._parse_log_time(self.log_until_var.get(), end=True)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e), parent=self.admin_window)
+            return
+        
+        status = self.log_status_var.get()
+        self.log_filters = {
+            'user_id': self.log_user_var.get().strip() or None,
+            'access_granted': None if status == "All" else status == "GRANTED",
+            'since': since,
+            'until': until,
+        }
+        self.reset_logs_list()
     
     def clear_logs(self):
         """Clear all access logs"""
-        if messagebox.askyesno("Confirm Clear", "Are you sure you want to clear all access logs?", parent=self.admin_window):
-            # This would require adding a method to DatabaseManager
-            messagebox.showinfo("Info", "This feature will be implemented in the next version", parent=self.admin_window)
+        if self.clearing_logs:
+            return
+        if messagebox.askyesno("Confirm Clear", "Are you sure you want to clear all access logs?\n"
+                               "They will be moved to a compressed archive file.", parent=self.admin_window):
+            self.clearing_logs = True
+            self.status_var.set("Archiving access logs...")
+            
+            def archive_thread():
+                # Archiving a large table takes minutes, keep the Tk thread free meanwhile
+                try:
+                    result = self.db_manager.archive_access_logs(older_than_days=0)
+                except Exception as e:
+                    result = e
+                self.root.after(0, lambda: self.logs_cleared(result))
+            
+            thread = threading.Thread(target=archive_thread, daemon=True)
+            thread.start()
+    
+    def logs_cleared(self, result):
+        """Report the result of clear_logs, back on the Tk thread"""
+        self.clearing_logs = False
+        # The admin panel may have been closed while archiving
+        parent = self.admin_window if self.admin_window is not None and self.admin_window.winfo_exists() else self.root
+        if isinstance(result, Exception):
+            self.status_var.set("Failed to clear access logs")
+            messagebox.showerror("Error", f"Failed to clear access logs: {str(result)}", parent=parent)
+            return
+        
+        archived, archive_path = result
+        self.status_var.set(f"{archived} log entries archived")
+        if parent is self.admin_window:
+            self.reset_logs_list()
+        if archived:
+            messagebox.showinfo("Success", f"{archived} log entries archived to {archive_path}", parent=parent)
+        else:
+            messagebox.showinfo("Info", "No access logs to clear", parent=parent)
     
     def regenerate_encodings(self):
         """Regenerate face encodings"""
+        if not self.require_ready(self.admin_window):
+            return
         if messagebox.askyesno("Confirm", "This will regenerate all face encodings. Continue?", parent=self.admin_window):
             self.status_var.set("Regenerating encodings...")
             
@@ -654,37 +891,60 @@ class MainGUI:
         cancel_btn.pack(side='left', padx=10)
     
     def update_system_info(self):
-        """Update system information display"""
+        """Update system information display with live recognition metrics"""
+        # The admin panel may have been closed since the last refresh
+        if not self.info_text.winfo_exists():
+            return
+        
+        face_system = self.face_system
+        if face_system is None:
+            self.info_text.config(state='normal')
+            self.info_text.delete(1.0, tk.END)
+            self.info_text.insert(1.0, "\nFace recognition is loading...\n")
+            self.info_text.config(state='disabled')
+            self.info_job = self.root.after(1000, self.update_system_info)
+            return
+        
+        snapshot = face_system.metrics.snapshot()
+        counters = snapshot['counters']
+        gauges = snapshot['gauges']
+        memory_text = f"{gauges['memory_bytes'] / 2**20:.0f} MB" if 'memory_bytes' in gauges else "unavailable"
+        
+        stage_lines = []
+        for stage in ('resize_convert', 'detect', 'track', 'quality', 'encode', 'match', 'lookup', 'log', 'draw',
+                      'frame', 'capture_to_result'):
+            stats = snapshot['stages'].get(stage)
+            if stats:
+                stage_lines.append(f"  {stage:<18} {stats['p50_ms']:8.2f} {stats['p90_ms']:8.2f} "
+                                   f"{stats['p99_ms']:8.2f}   {stats['count']}")
+        
         info_text = f"""
 System Status:
-- Database: Connected
-- Face Recognition: Ready
-- Camera: Available
+- Users: {len(face_system.user_directory)}
+- Gallery: {len(face_system.gallery)} encodings ({gauges.get('gallery_bytes', 0) / 2**20:.1f} MB), version {face_system.live_gallery.version}, updated {face_system.live_gallery.age() / 60:.0f} min ago
+- Memory: {memory_text}
+- Detector: {face_system.detector_backend.name}
 
-Statistics:
-- Total Users: {len(self.db_manager.get_all_users())}
-- Recent Access Logs: {len(self.db_manager.get_access_logs(50))}
+Frames:
+- Captured: {counters.get('frames_captured', 0)}  Analyzed: {counters.get('frames_analyzed', 0)}  Idle: {counters.get('frames_idle', 0)}  Dropped: {gauges.get('frames_dropped', 0)}
+- Faces detected: {counters.get('faces_detected', 0)}  Encoded: {counters.get('faces_encoded', 0)}  Low quality: {counters.get('faces_low_quality', 0)} ({gauges.get('faces_skip_rate', 0):.0%} skipped)
+
+Stage timings (ms, last {face_system.metrics.window} samples):
+  {'stage':<18} {'p50':>8} {'p90':>8} {'p99':>8}   count
+{chr(10).join(stage_lines) or '  No frames analyzed yet'}
 
 Configuration:
-- Recognition Confidence: 60%
-- Cooldown Period: 2 seconds
-- Max Log Entries: 100
-
-Default Admin Credentials:
-- Username: admin
-- Password: admin123
-
-Instructions:
-1. Add users through the Users Management tab
-2. Upload clear face photos for better recognition
-3. Use the CHECK button to test face recognition
-4. Monitor access through the Access Logs tab
+- Recognition Confidence: {face_system.confidence_threshold:.0%}
+- Visit Gap: {face_system.visits.visit_gap:g} seconds
+- Metrics file: {face_system.metrics_file}
         """
         
         self.info_text.config(state='normal')
         self.info_text.delete(1.0, tk.END)
         self.info_text.insert(1.0, info_text)
         self.info_text.config(state='disabled')
+        
+        self.info_job = self.root.after(1000, self.update_system_info)
     
     def run(self):
         """Start the GUI application"""
@@ -0,0 +1,190 @@
+import os
+import sys
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+def process_memory_bytes():
+    """Resident memory of this process in bytes (peak RSS where the current one is unavailable).
+
+    Returns None where neither is available, e.g. on Windows.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+class Metrics:
+    """Per-stage timers, counters and gauges for the recognition hot path.
+
+    Each stage keeps its last window samples, so percentiles follow the
+    recent behaviour rather than the whole run. Safe to update from the
+    recognition threads while the GUI or an exporter reads snapshots.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.started = time.time()
+        self._samples = {}
+        self._totals = {}
+        self._counters = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        """Record one duration for stage"""
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._totals[stage] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[stage]
+            totals[0] += 1
+            totals[1] += seconds
+
+    @contextmanager
+    def stage(self, stage):
+        """Time the enclosed block as one sample of stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def incr(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def set_gauge(self, gauge, value):
+        """Set a gauge to a value, or to a function called for its value at each snapshot"""
+        with self._lock:
+            self._gauges[gauge] = value
+
+    def snapshot(self):
+        """Return {'stages': {stage: {count, total, mean, p50, p90, p99}}, 'counters', 'gauges'} (times in ms)"""
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items()}
+            totals = {stage: tuple(total) for stage, total in self._totals.items()}
+            counters = dict(self._counters)
+            gauges = {gauge: value() if callable(value) else value for gauge, value in self._gauges.items()}
+
+        stages = {}
+        for stage, values in samples.items():
+            count, total = totals[stage]
+            stats = {'count': count, 'total_s': total, 'mean_ms': values.mean() * 1000}
+            for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                stats[f"p{round(q * 100)}_ms"] = value * 1000
+            stages[stage] = stats
+
+        memory = process_memory_bytes()
+        if memory is not None:
+            gauges['memory_bytes'] = memory
+        gauges['uptime_seconds'] = time.time() - self.started
+        return {'stages': stages, 'counters': counters, 'gauges': gauges}
+
+    def to_prometheus(self):
+        """Render a snapshot in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = ["# TYPE face_stage_seconds summary"]
+        for stage, stats in sorted(snapshot['stages'].items()):
+            for q in QUANTILES:
+                value = stats[f"p{round(q * 100)}_ms"] / 1000
+                lines.append(f'face_stage_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'face_stage_seconds_sum{{stage="{stage}"}} {stats["total_s"]:.6f}')
+            lines.append(f'face_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        for counter, value in sorted(snapshot['counters'].items()):
+            lines.append(f"# TYPE face_{counter}_total counter")
+            lines.append(f"face_{counter}_total {value}")
+        for gauge, value in sorted(snapshot['gauges'].items()):
+            lines.append(f"# TYPE face_{gauge} gauge")
+            lines.append(f"face_{gauge} {value}")
+        return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """Writes the metrics to a file every interval seconds and/or serves them over HTTP.
+
+    The file is replaced atomically, so it can be read by a node_exporter
+    textfile collector; the endpoint answers GET /metrics on localhost.
+    """
+
+    def __init__(self, metrics, path=None, port=None, interval=5.0, host="127.0.0.1"):
+        self.metrics = metrics
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self.host = host
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def write_file(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(self.metrics.to_prometheus())
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write_file()
+            except Exception as e:
+                # Keep exporting, a failed write is retried on the next interval
+                print(f"Error writing metrics: {str(e)}")
+
+    def start(self):
+        if self.path:
+            self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+            self._thread.start()
+
+        if self.port:
+            metrics = self.metrics
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = metrics.to_prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass  # Scrapes are not worth a console line each
+
+            try:
+                self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            except OSError as e:
+                print(f"Error starting metrics endpoint on port {self.port}: {str(e)}")
+            else:
+                threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+                print(f"Metrics available at http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            try:
+                self.write_file()  # Leave the final values behind
+            except Exception as e:
+                print(f"Error writing metrics: {str(e)}")
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,87 @@
+import time
+import cv2
+import numpy as np
+
+class MotionGate:
+    """Cheap scene-change gate in front of face detection.
+
+    Each checked frame is reduced to a tiny grayscale thumbnail and compared
+    with the previous one. After idle_after seconds without motion (and no
+    face being tracked) the gate goes idle: detection is skipped and the
+    caller should only poll every idle_poll_interval seconds. The first
+    polled frame that shows motion switches straight back to active.
+    While idle, one frame every refresh_interval seconds is still let
+    through, so a face that arrived too slowly to register as motion is
+    found eventually (None disables this).
+    """
+
+    def __init__(self, threshold=6.0, idle_after=2.0, idle_poll_interval=0.1, refresh_interval=5.0, thumb_size=(32, 24)):
+        self.threshold = threshold
+        self.idle_after = idle_after
+        self.idle_poll_interval = idle_poll_interval
+        self.refresh_interval = refresh_interval
+        self.thumb_size = thumb_size
+
+        self.idle = False
+        self._previous = None
+        self._last_motion = time.time()
+        self._last_check = None
+        self._last_refresh = None
+
+        # Time spent and checks done in each mode
+        self.active_time = 0.0
+        self.idle_time = 0.0
+        self.active_checks = 0
+        self.idle_checks = 0
+        self.refreshes = 0
+
+    def _thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def check(self, frame, keep_active=False, now=None):
+        """Return True if the frame should go through detection.
+
+        keep_active holds the gate open regardless of motion, e.g. while a
+        face is tracked, since someone standing still produces no motion.
+        """
+        now = now if now is not None else time.time()
+        if self._last_check is not None:
+            if self.idle:
+                self.idle_time += now - self._last_check
+            else:
+                self.active_time += now - self._last_check
+        self._last_check = now
+
+        thumb = self._thumbnail(frame)
+        motion = self._previous is None or np.abs(thumb - self._previous).mean() > self.threshold
+        self._previous = thumb
+
+        if motion or keep_active:
+            self._last_motion = now
+            self.idle = False
+        elif not self.idle and now - self._last_motion >= self.idle_after:
+            self.idle = True
+            self._last_refresh = now
+
+        if not self.idle:
+            self.active_checks += 1
+            return True
+
+        self.idle_checks += 1
+        if self.refresh_interval is not None and now - self._last_refresh >= self.refresh_interval:
+            self._last_refresh = now
+            self.refreshes += 1
+            return True
+        return False
+
+    def stats(self):
+        """Return the time spent (seconds) and checks done in each mode"""
+        return {
+            'mode': 'idle' if self.idle else 'active',
+            'active_time': self.active_time,
+            'idle_time': self.idle_time,
+            'active_checks': self.active_checks,
+            'idle_checks': self.idle_checks,
+            'refreshes': self.refreshes,
+        }
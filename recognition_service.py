@@ -0,0 +1,178 @@
+import os
+import re
+import sys
+import time
+import queue
+import signal
+import argparse
+import threading
+import multiprocessing as mp
+
+def parse_source(source):
+    """Device indices are given as plain numbers, anything else is a path or URL"""
+    return int(source) if source.isdigit() else source
+
+def run_worker(source, detector, stop_request, stats_queue, stats_interval):
+    """Worker process: headless recognition on one source.
+
+    Each worker memory-maps the same EncodedImages.gallery, so the gallery
+    pages are shared read-only between all of them. Exits with 0 when asked
+    to stop or when a video file ended, 1 when the source failed.
+    """
+    # The parent handles Ctrl+C and tells workers to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from run_face_recognition import FaceRecognitionSystem
+    from camera_manager import get_camera
+    # One metrics file per source, e.g. metrics-rtsp_door_2_local_stream.prom
+    slug = re.sub(r'\W+', '_', str(source)).strip('_')
+    system = FaceRecognitionSystem(detector_backend=detector, metrics_file=f"metrics-{slug}.prom")
+
+    def report_stats():
+        last_time, last_recognized = time.time(), 0
+        while not stop_request.wait(stats_interval):
+            now, stats = time.time(), dict(system.pipeline_stats)
+            stats['fps'] = (stats['recognized'] - last_recognized) / (now - last_time)
+            last_time, last_recognized = now, stats['recognized']
+            try:
+                stats_queue.put_nowait((str(source), stats))
+            except queue.Full:
+                pass
+
+    threading.Thread(target=report_stats, daemon=True).start()
+
+    ok = system.start_camera_check(source=source, display=False, stop_request=stop_request)
+    get_camera(source).close()
+    system.db_manager.stop_log_writer()
+
+    if ok or stop_request.is_set() or os.path.isfile(str(source)):
+        sys.exit(0)
+    sys.exit(1)
+
+class RecognitionService:
+    """Runs one recognition worker process per video source.
+
+    A worker that fails (camera unplugged, stream dropped) is restarted
+    after a backoff that doubles up to max_backoff seconds, and reset once
+    the worker has run for a while. Per-source FPS, capture-to-result
+    latency and dropped frames are printed every stats_interval seconds.
+    """
+
+    def __init__(self, sources, detector=None, stats_interval=10.0, max_backoff=60.0):
+        # Workers are supervised per source, a repeated source would orphan one
+        duplicates = sorted({str(source) for source in sources if list(sources).count(source) > 1})
+        if duplicates:
+            raise ValueError(f"Sources listed more than once: {', '.join(duplicates)}")
+        self.sources = sources
+        self.detector = detector
+        self.stats_interval = stats_interval
+        self.max_backoff = max_backoff
+
+        self.stop_request = mp.Event()
+        self.stats_queue = mp.Queue(maxsize=1000)
+        self.workers = {}
+        self.stats = {}
+        self._terminated = False
+
+    def _start_worker(self, source):
+        process = mp.Process(target=run_worker, name=f"recognition-{source}",
+                             args=(source, self.detector, self.stop_request, self.stats_queue,
+                                   self.stats_interval))
+        process.start()
+        state = self.workers.setdefault(source, {'restarts': 0, 'backoff': 1.0})
+        state.update(process=process, started=time.time(), restart_at=None)
+
+    def _supervise(self):
+        """Restart failed workers, returns False once every worker has finished"""
+        now = time.time()
+        alive = False
+        for source, state in self.workers.items():
+            process = state['process']
+            if process.is_alive():
+                alive = True
+                # Reset the backoff after a minute of healthy running
+                if now - state['started'] > 60:
+                    state['backoff'] = 1.0
+                continue
+
+            if process.exitcode == 0 and state['restart_at'] is None:
+                continue  # Finished normally
+
+            alive = True
+            if state['restart_at'] is None:
+                state['restart_at'] = now + state['backoff']
+                print(f"Source {source} failed (exit code {process.exitcode}), "
+                      f"restarting in {state['backoff']:.0f}s")
+                state['backoff'] = min(state['backoff'] * 2, self.max_backoff)
+            elif now >= state['restart_at']:
+                state['restarts'] += 1
+                self._start_worker(source)
+        return alive
+
+    def _drain_stats(self):
+        while True:
+            try:
+                source, stats = self.stats_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.stats[source] = stats
+
+    def print_stats(self):
+        for source, state in self.workers.items():
+            stats = self.stats.get(str(source))
+            if stats is None:
+                continue
+            print(f"[{source}] {stats['fps']:5.1f} fps | latency {stats['latency_ms']:6.1f} ms | "
+                  f"{stats['recognized']} frames | {stats['dropped']} dropped | {state['restarts']} restarts")
+
+    def run(self):
+        """Start every source and supervise them until stopped"""
+        for source in self.sources:
+            self._start_worker(source)
+
+        signal.signal(signal.SIGTERM, self._on_sigterm)
+        next_report = time.time() + self.stats_interval
+        try:
+            while not self._terminated and not self.stop_request.is_set():
+                if not self._supervise():
+                    break
+                self._drain_stats()
+                if time.time() >= next_report:
+                    self.print_stats()
+                    next_report = time.time() + self.stats_interval
+                self.stop_request.wait(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _on_sigterm(self, signum, frame):
+        # Only a plain flag: the handler runs on the main thread, which is usually inside
+        # stop_request.wait() holding the event's lock, so setting the event here deadlocks
+        self._terminated = True
+
+    def stop(self, timeout=10):
+        """Ask every worker to stop and wait for them"""
+        self.stop_request.set()
+        for source, state in self.workers.items():
+            state['process'].join(timeout)
+            if state['process'].is_alive():
+                print(f"Worker for {source} did not stop, terminating")
+                state['process'].terminate()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless multi-camera face recognition service")
+    parser.add_argument("sources", nargs="+",
+                        help="video sources: device index, video file or stream URL")
+    parser.add_argument("--detector", default=None,
+                        help="face detector backend (default: $FACE_DETECTOR or hog)")
+    parser.add_argument("--stats-interval", type=float, default=10.0,
+                        help="seconds between per-source stats reports")
+    args = parser.parse_args()
+
+    sources = [parse_source(source) for source in args.sources]
+    if len(set(sources)) != len(sources):
+        parser.error("each source may only be given once")
+
+    service = RecognitionService(sources, detector=args.detector, stats_interval=args.stats_interval)
+    service.run()
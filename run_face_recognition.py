@@ -1,144 +1,419 @@
 import cv2
 import face_recognition
-import numpy as np
 import cvzone
 from database_manager import DatabaseManager
 from enhanced_encoder import EnhancedEncoder
+from live_gallery import LiveGallery
+from face_tracker import FaceTracker, box_iou
+from camera_manager import get_camera
+from visit_engine import VisitEngine
+from adaptive_detector import AdaptiveDetector
+from motion_gate import MotionGate
+from access_log_writer import utc_timestamp
+from metrics import Metrics, MetricsExporter
+from face_quality import FaceQualityGate
 import threading
 import time
+import os
+import argparse
+
+class HOGDetector:
+    """dlib HOG detector from face_recognition (the original behaviour)"""
+    
+    name = "hog"
+    
+    def __init__(self, upsample=1):
+        self.upsample = upsample
+    
+    def detect(self, rgb_image):
+        """Return (top, right, bottom, left) face boxes in an RGB image"""
+        return face_recognition.face_locations(rgb_image, self.upsample, model="hog")
+
+class HaarCascadeDetector:
+    """OpenCV Haar cascade: much cheaper than HOG, but more false positives"""
+    
+    name = "haar"
+    
+    def __init__(self, cascade_file="haarcascade_frontalface_default.xml", scale_factor=1.1,
+                 min_neighbors=5, min_size=(20, 20)):
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + cascade_file)
+        if self.cascade.empty():
+            raise RuntimeError(f"Could not load Haar cascade {cascade_file}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+    
+    def detect(self, rgb_image):
+        """Return (top, right, bottom, left) face boxes in an RGB image"""
+        gray = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2GRAY)
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=self.scale_factor,
+                                              minNeighbors=self.min_neighbors, minSize=self.min_size)
+        return [(int(y), int(x + w), int(y + h), int(x)) for x, y, w, h in faces]
+
+class CascadeHOGDetector:
+    """Two-stage detector: the Haar cascade proposes regions, HOG confirms them.
+    
+    HOG only runs on a small crop around each proposal (scaled so the face
+    is about confirm_size pixels), so an empty scene costs a cascade pass
+    and Haar false positives are filtered out.
+    """
+    
+    name = "cascade"
+    
+    def __init__(self, margin=0.4, confirm_size=100):
+        self.proposer = HaarCascadeDetector(min_neighbors=3)
+        self.confirmer = HOGDetector(upsample=0)
+        self.margin = margin
+        self.confirm_size = confirm_size
+    
+    def detect(self, rgb_image):
+        """Return (top, right, bottom, left) face boxes in an RGB image"""
+        height, width = rgb_image.shape[:2]
+        boxes = []
+        
+        for top, right, bottom, left in self.proposer.detect(rgb_image):
+            size = bottom - top
+            margin = int(size * self.margin)
+            crop_top, crop_left = max(0, top - margin), max(0, left - margin)
+            crop = rgb_image[crop_top:min(height, bottom + margin), crop_left:min(width, right + margin)]
+            
+            scale = self.confirm_size / float(size)
+            if scale != 1.0:
+                crop = cv2.resize(crop, (0, 0), None, scale, scale)
+            
+            for t, r, b, l in self.confirmer.detect(crop):
+                box = (round(t / scale) + crop_top, round(r / scale) + crop_left,
+                       round(b / scale) + crop_top, round(l / scale) + crop_left)
+                if all(box_iou(box, found) < 0.5 for found in boxes):
+                    boxes.append(box)
+        
+        return boxes
+
+# Detector backends selectable by name, e.g. FACE_DETECTOR=cascade
+DETECTOR_BACKENDS = {
+    HOGDetector.name: HOGDetector,
+    HaarCascadeDetector.name: HaarCascadeDetector,
+    CascadeHOGDetector.name: CascadeHOGDetector,
+}
+
+def create_detector_backend(name=None):
+    """Create a detector backend by name (default: $FACE_DETECTOR or 'hog')"""
+    name = name or os.environ.get("FACE_DETECTOR", "hog")
+    if name not in DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown detector '{name}', choose from {', '.join(DETECTOR_BACKENDS)}")
+    return DETECTOR_BACKENDS[name]()
 
 class FaceRecognitionSystem:
-    def __init__(self):
-        self.db_manager = DatabaseManager()
-        self.encoder = EnhancedEncoder()
-        self.encode_list_known = []
-        self.models_ids = []
+    def __init__(self, detector_backend=None, metrics_file=None, metrics_port=None, db_manager=None, encoder=None):
+        self.metrics = Metrics()
+        self.metrics_file = metrics_file or os.environ.get("FACE_METRICS_FILE", "metrics.prom")
+        self.metrics_port = metrics_port or int(os.environ.get("FACE_METRICS_PORT", 0)) or None
+        self.db_manager = db_manager or DatabaseManager()
+        self.user_directory = self.db_manager.get_user_directory()
+        self.log_writer = self.db_manager.start_log_writer()
+        self.encoder = encoder or EnhancedEncoder(db_manager=self.db_manager)
+        self.live_gallery = LiveGallery(self.encoder, check_interval=2.0, on_swap=self._on_gallery_swap)
+        self._gallery_version = 0  # Gallery version the current tracks were identified against
+        self.match_tolerance = 0.6  # Same default as face_recognition.compare_faces
+        self.confidence_threshold = 0.6
+        self.detector_backend = create_detector_backend(detector_backend)
+        self.detector = AdaptiveDetector(detect_fn=self.detector_backend.detect, metrics=self.metrics)
+        self.motion_gate = MotionGate(threshold=6.0, idle_after=2.0, idle_poll_interval=0.1, refresh_interval=5.0)
+        self.tracker = FaceTracker(reverify_interval=1.0)  # seconds between re-encoding a tracked face
+        self.quality_gate = FaceQualityGate(min_face_size=40, min_sharpness=30.0, max_yaw=0.45)
         self.load_encodings()
         self.access_granted = False
         self.access_message = ""
-        self.last_recognition_time = 0
-        self.recognition_cooldown = 2  # seconds
+        self.visits = VisitEngine(visit_gap=5.0)  # seconds unseen before a visit is logged
+        self.pipeline_stats = {'captured': 0, 'recognized': 0, 'dropped': 0, 'latency_ms': 0.0}
         
+    @property
+    def gallery(self):
+        """The Gallery of the current snapshot"""
+        return self.live_gallery.current.gallery
+    
     def load_encodings(self):
-        """Load face encodings from file"""
-        encodings_data = self.encoder.load_encodings()
-        if encodings_data:
-            self.encode_list_known, self.models_ids = encodings_data
-            print(f"Loaded {len(self.encode_list_known)} face encodings")
-        else:
-            print("No encodings loaded. Please generate encodings first.")
+        """Load face encodings from file, then follow changes to it"""
+        self.live_gallery.reload(force=True)
+        self.live_gallery.start_watching()
+    
+    def _on_gallery_swap(self, snapshot):
+        self.metrics.set_gauge('gallery_version', snapshot.version)
+        self.metrics.set_gauge('gallery_size', len(snapshot.gallery))
+        self.metrics.set_gauge('gallery_bytes', snapshot.gallery.encodings.nbytes)
+        self.metrics.set_gauge('gallery_age_seconds', self.live_gallery.age)
     
     def reload_encodings(self):
-        """Reload encodings (useful after adding/removing people)"""
-        self.load_encodings()
+        """Reload encodings in the background (useful after adding/removing people)"""
+        self.live_gallery.reload_async(force=True)
     
-    def recognize_face(self, frame):
-        """Recognize faces in the given frame"""
+    def analyze_frame(self, frame):
+        """Detect, identify and log the faces in a frame without drawing on it.
+
+        Returns (faces, recognized_users) where each face is a dict with its
+        full-resolution 'box', a 'label' and a BGR 'color' for drawing.
+        """
         current_time = time.time()
+        frame_start = time.perf_counter()
+        metrics = self.metrics
         
-        # Resize frame for faster processing
-        frame_s = cv2.resize(frame, (0, 0), None, 0.25, 0.25)
-        frame_s = cv2.cvtColor(frame_s, cv2.COLOR_BGR2RGB)
+        # One gallery generation for the whole frame, even if a reload swaps in meanwhile
+        snapshot = self.live_gallery.current
+        if snapshot.version != self._gallery_version:
+            # Identities from the previous gallery may be stale: verify every face again
+            self.tracker.reset()
+            self._gallery_version = snapshot.version
         
-        # Find face locations and encodings
-        face_current_frame = face_recognition.face_locations(frame_s)
-        encode_current_frame = face_recognition.face_encodings(frame_s, face_current_frame)
+        # Find face locations, searching around the tracked faces first
+        face_current_frame = self.detector.detect(frame, [track.box for track in self.tracker.tracks])
+        with metrics.stage('track'):
+            tracks = self.tracker.update(face_current_frame)
+        metrics.incr('faces_detected', len(face_current_frame))
         
-        recognized_users = []
+        # Pick up user edits made by other processes (throttled, reloads only when users changed)
+        with metrics.stage('lookup'):
+            self.user_directory.refresh_if_changed()
         
-        for encode_face, face_loc in zip(encode_current_frame, face_current_frame):
-            # Compare with known faces
-            matches = face_recognition.compare_faces(self.encode_list_known, encode_face)
-            face_distances = face_recognition.face_distance(self.encode_list_known, encode_face)
+        # Only new tracks, or tracks due for re-verification, are encoded
+        to_verify = [track for track in tracks if self.tracker.needs_verification(track, current_time)]
+        if to_verify:
+            with metrics.stage('resize_convert'):
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             
-            # Find the best match
-            if len(face_distances) > 0:
-                match_index = np.argmin(face_distances)
-                confidence = 1 - face_distances[match_index]
+            # Blurry, tiny, badly lit or side-on faces are not worth an encoding; retried next frame
+            with metrics.stage('quality'):
+                passed = [track for track in to_verify if self.quality_gate.check(frame_rgb, track.box)[0]]
+            metrics.incr('faces_low_quality', len(to_verify) - len(passed))
+            to_verify = passed
+            metrics.set_gauge('faces_skip_rate', self.quality_gate.stats()['skip_rate'])
+        
+        if to_verify:
+            with metrics.stage('encode'):
+                encode_current_frame = face_recognition.face_encodings(frame_rgb, [track.box for track in to_verify])
+            metrics.incr('faces_encoded', len(to_verify))
+            
+            # Match every face in the frame against the gallery in one pass
+            with metrics.stage('match'):
+                best_matches = snapshot.gallery.match(encode_current_frame)
+            for track, candidates in zip(to_verify, best_matches):
+                if candidates:
+                    user_id, distance = candidates[0]
+                    if distance > self.match_tolerance or 1 - distance <= self.confidence_threshold:
+                        user_id = None
+                    track.identify(user_id, distance, current_time)
+                else:
+                    track.identify(None, None, current_time)
+        
+        faces = []
+        recognized_users = []
+        
+        for track in tracks:
+            # Tracks only carry a distance once matched against a non-empty gallery
+            if track.distance is not None:
+                user_id = track.user_id
+                confidence = track.confidence
                 
-                # Scale back face location coordinates
-                top, right, bottom, left = face_loc
-                top, right, bottom, left = top * 4, right * 4, bottom * 4, left * 4
+                box = track.box
                 
-                # Draw rectangle around face
-                if matches[match_index] and confidence > 0.6:  # Confidence threshold
-                    user_id = self.models_ids[match_index]
-                    user_info = self.db_manager.get_user(user_id)
+                if user_id is not None:
+                    with metrics.stage('lookup'):
+                        user_info = self.user_directory.get(user_id)
                     
-                    if user_info and user_info[6] == 'active':  # Check if user is active
-                        # Draw green rectangle for recognized face
-                        cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
+                    if user_info and user_info[1] == 'active':  # Check if user is active
+                        name = user_info[0]
                         
-                        # Add user name
-                        cv2.putText(frame, user_info[2], (left, top - 10), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+                        # Green box with the user name for recognized face
+                        faces.append({'box': box, 'label': name, 'color': (0, 255, 0)})
                         
                         recognized_users.append({
                             'user_id': user_id,
-                            'name': user_info[2],
-                            'confidence': confidence
+                            'name': name,
+                            'confidence': confidence,
+                            'track_id': track.track_id
                         })
                         
-                        # Log access (with cooldown to prevent spam)
-                        if current_time - self.last_recognition_time > self.recognition_cooldown:
-                            self.db_manager.log_access(user_id, True)
-                            self.last_recognition_time = current_time
-                            print(f"Access granted for: {user_info[2]} (ID: {user_id})")
+                        # Sightings of the same person are collapsed into one visit
+                        visit, started = self.visits.observe(user_id, user_id, True, confidence, current_time)
+                        if started:
+                            self.log_visit_start(visit)
+                            print(f"Access granted for: {name} (ID: {user_id})")
                     else:
-                        # Draw red rectangle for inactive user
-                        cv2.rectangle(frame, (left, top), (right, bottom), (0, 0, 255), 2)
-                        cv2.putText(frame, "INACTIVE", (left, top - 10), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
+                        # Red box for inactive user
+                        faces.append({'box': box, 'label': "INACTIVE", 'color': (0, 0, 255)})
                 else:
-                    # Draw red rectangle for unknown face
-                    cv2.rectangle(frame, (left, top), (right, bottom), (0, 0, 255), 2)
-                    cv2.putText(frame, "UNKNOWN", (left, top - 10), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
+                    # Red box for unknown face
+                    faces.append({'box': box, 'label': "UNKNOWN", 'color': (0, 0, 255)})
                     
-                    # Log failed access attempt
-                    if current_time - self.last_recognition_time > self.recognition_cooldown:
-                        self.db_manager.log_access("unknown", False)
-                        self.last_recognition_time = current_time
+                    # Unknown faces are told apart by their track; their closest distance is no confidence
+                    visit, started = self.visits.observe(f"unknown:{track.track_id}", "unknown", False,
+                                                         None, current_time)
+                    if started:
+                        self.log_visit_start(visit)
                         print("Access denied for unknown face")
+            elif track.verified_at is None:
+                # Not identified yet, e.g. held back by the quality gate: shown, but neither granted nor denied
+                faces.append({'box': track.box, 'label': "CHECKING", 'color': (0, 255, 255)})
         
-        return frame, recognized_users
+        # Complete the log rows of the visits that just ended
+        with metrics.stage('log'):
+            self.log_visits(self.visits.expire(current_time))
+        
+        metrics.observe('frame', time.perf_counter() - frame_start)
+        metrics.incr('frames_analyzed')
+        return faces, recognized_users
+    
+    def log_visit_start(self, visit):
+        """Write a visit's access log row as soon as it starts, so it survives a crash"""
+        self.db_manager.log_access(visit.user_id, visit.access_granted,
+                                   access_time=utc_timestamp(visit.start),
+                                   visit_end=utc_timestamp(visit.end),
+                                   confidence=visit.best_confidence,
+                                   sightings=visit.sightings,
+                                   visit_id=visit.visit_id)
     
-    def start_camera_check(self, callback=None):
-        """Start camera for face recognition checking"""
-        cap = cv2.VideoCapture(0)
+    def log_visits(self, visits):
+        """Complete the access log rows of finished visits"""
+        for visit in visits:
+            if visit.sightings == 1:
+                continue  # Nothing changed since log_visit_start
+            self.db_manager.end_visit(visit.visit_id, utc_timestamp(visit.end), visit.best_confidence,
+                                      visit.sightings, visit.user_id, visit.access_granted,
+                                      access_time=utc_timestamp(visit.start))
+    
+    def draw_faces(self, frame, faces):
+        """Draw the boxes and labels returned by analyze_frame onto frame"""
+        with self.metrics.stage('draw'):
+            for face in faces:
+                top, right, bottom, left = face['box']
+                cv2.rectangle(frame, (left, top), (right, bottom), face['color'], 2)
+                cv2.putText(frame, face['label'], (left, top - 10), 
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.9, face['color'], 2)
+        return frame
+    
+    def draw_status(self, frame, recognized_users):
+        """Draw the access status line and instructions onto frame"""
+        if recognized_users:
+            status_text = f"ACCESS GRANTED - {len(recognized_users)} user(s) recognized"
+            color = (0, 255, 0)
+        else:
+            status_text = "ACCESS DENIED - No authorized users detected"
+            color = (0, 0, 255)
+
+        cv2.putText(frame, status_text, (10, 30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
 
-        if not cap.isOpened():
-            print("Error: Could not open camera")
+        # Add instructions
+        cv2.putText(frame, "Press 'Q' to quit", (10, frame.shape[0] - 10),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        return frame
+    
+    def recognize_face(self, frame):
+        """Recognize faces in the given frame"""
+        faces, recognized_users = self.analyze_frame(frame)
+        return self.draw_faces(frame, faces), recognized_users
+    
+    def start_camera_check(self, callback=None, source=0, display=True, stop_request=None):
+        """Start camera for face recognition checking.
+
+        Frames come from the shared camera manager, which fans them out to
+        a recognition and a rendering subscription (drop-oldest queues):
+        recognition always works on the newest frame and rendering overlays
+        the latest results at camera rate.
+
+        source is a device index, video file or stream URL. With display off
+        nothing is rendered and the check runs until stop_request (any object
+        with is_set()) is set or the source fails. Returns False if the
+        source could not be opened or stopped delivering frames.
+        """
+        camera = get_camera(source)
+        recognition_frames = camera.subscribe()
+        if recognition_frames is None:
             return False
+        display_frames = camera.subscribe() if display else None
+
+        if display:
+            print("Camera started. Press 'q' to quit, 'r' to reload encodings")
+        else:
+            print(f"Recognition started on {source}")
+
+        stop_event = threading.Event()
+        results_lock = threading.Lock()
+        latest = {'faces': [], 'recognized_users': []}
+        source_failed = threading.Event()
+        self.pipeline_stats = {'captured': 0, 'recognized': 0, 'dropped': 0, 'latency_ms': 0.0}
+        exporter = MetricsExporter(self.metrics, self.metrics_file, self.metrics_port).start()
+
+        def recognition_loop():
+            while not stop_event.is_set():
+                item = recognition_frames.get(timeout=0.1)
+                if item is None:
+                    if recognition_frames.failed.is_set():
+                        source_failed.set()
+                        stop_event.set()
+                    continue
+                frame, captured_at = item
+
+                # Frames delivered to this check, whether recognized or dropped
+                captured = recognition_frames.frames.put_count
+                self.metrics.incr('frames_captured', captured - self.pipeline_stats['captured'])
+                self.pipeline_stats['captured'] = captured
+
+                # Skip detection while nothing moves, polling at a low rate
+                if not self.motion_gate.check(frame, keep_active=bool(self.tracker.tracks)):
+                    self.metrics.incr('frames_idle')
+                    self.log_visits(self.visits.expire())
+                    with results_lock:
+                        latest['faces'] = []
+                        latest['recognized_users'] = []
+                    stop_event.wait(self.motion_gate.idle_poll_interval)
+                    continue
+
+                # Perform face recognition
+                faces, recognized_users = self.analyze_frame(frame)
+                with results_lock:
+                    latest['faces'] = faces
+                    latest['recognized_users'] = recognized_users
+
+                # Capture-to-result latency, smoothed
+                latency_ms = (time.time() - captured_at) * 1000
+                stats = self.pipeline_stats
+                stats['recognized'] += 1
+                stats['dropped'] = recognition_frames.frames.dropped
+                stats['latency_ms'] = latency_ms if stats['recognized'] == 1 else 0.9 * stats['latency_ms'] + 0.1 * latency_ms
+                self.metrics.observe('capture_to_result', latency_ms / 1000)
+                self.metrics.set_gauge('frames_dropped', recognition_frames.frames.dropped)
+
+                # Call callback if provided
+                if callback:
+                    callback(recognized_users)
 
-        print("Camera started. Press 'q' to quit, 'r' to reload encodings")
+        recognition_thread = threading.Thread(target=recognition_loop, daemon=True)
+        recognition_thread.start()
 
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("Error: Could not read frame")
+        # Headless: just wait for a stop request or a source failure
+        while not display and not stop_event.is_set():
+            if stop_request is not None and stop_request.is_set():
                 break
-            
-            # Perform face recognition
-            frame, recognized_users = self.recognize_face(frame)
+            stop_event.wait(0.2)
 
-            # Add status text
-            if recognized_users:
-                status_text = f"ACCESS GRANTED - {len(recognized_users)} user(s) recognized"
-                color = (0, 255, 0)
-            else:
-                status_text = "ACCESS DENIED - No authorized users detected"
-                color = (0, 0, 255)
+        # Render on this thread, which owns the OpenCV window
+        while display and not stop_event.is_set():
+            if stop_request is not None and stop_request.is_set():
+                break
 
-            cv2.putText(frame, status_text, (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+            item = display_frames.get(timeout=0.1)
+            if item is not None:
+                # Camera frames are shared with the other subscribers
+                frame = item[0].copy()
+                with results_lock:
+                    faces = latest['faces']
+                    recognized_users = latest['recognized_users']
 
-            # Add instructions
-            cv2.putText(frame, "Press 'Q' to quit", (10, frame.shape[0] - 10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                self.draw_faces(frame, faces)
+                self.draw_status(frame, recognized_users)
 
-            # Show frame
-            cv2.imshow("Face Recognition System", frame)
+                # Show frame
+                cv2.imshow("Face Recognition System", frame)
 
             # Handle key presses
             key = cv2.waitKey(1) & 0xFF
@@ -148,20 +423,36 @@ class FaceRecognitionSystem:
                 print("Reloading encodings...")
                 self.reload_encodings()
 
-            # Call callback if provided
-            if callback:
-                callback(recognized_users)
+        stop_event.set()
+        recognition_thread.join(timeout=2)
+        recognition_frames.close()
+        if display_frames is not None:
+            display_frames.close()
+        
+        # Nobody is at the door any more once the camera stops
+        self.log_visits(self.visits.close_all())
+        
+        detector_stats = self.detector.stats()
+        print(f"Detection: {detector_stats['full_scans']} full scans, {detector_stats['roi_scans']} ROI scans, "
+              f"{detector_stats['detect_time']:.1f}s spent, ~{detector_stats['saved_time']:.1f}s saved")
+        gate_stats = self.motion_gate.stats()
+        print(f"Motion gate: {gate_stats['active_time']:.1f}s active, {gate_stats['idle_time']:.1f}s idle, "
+              f"{gate_stats['refreshes']} idle refreshes")
+
+        exporter.stop()
+        if display:
+            cv2.destroyAllWindows()
+        return not source_failed.is_set()
 
-        cap.release()
-        cv2.destroyAllWindows()
-        return True
     def test_single_image(self, image_path):
         """Test recognition on a single image"""
         img = cv2.imread(image_path)
         if img is None:
             return False, "Could not read image"
         
+        self.tracker.reset()
         frame, recognized_users = self.recognize_face(img)
+        self.log_visits(self.visits.close_all())
         
         cv2.imshow("Recognition Test", frame)
         cv2.waitKey(0)
@@ -170,5 +461,10 @@ class FaceRecognitionSystem:
         return True, recognized_users
 
 if __name__ == "__main__":
-    system = FaceRecognitionSystem()
+    parser = argparse.ArgumentParser(description="Real-time face recognition access check")
+    parser.add_argument("--detector", choices=sorted(DETECTOR_BACKENDS), default=None,
+                        help="face detector backend (default: $FACE_DETECTOR or hog)")
+    args = parser.parse_args()
+
+    system = FaceRecognitionSystem(detector_backend=args.detector)
     system.start_camera_check()
\ No newline at end of file
@@ -0,0 +1,33 @@
+import threading
+
+# One instance of each service per process, created on first use
+_services = {}
+_services_lock = threading.RLock()
+
+def get_db_manager():
+    """Return the shared DatabaseManager"""
+    with _services_lock:
+        if 'db_manager' not in _services:
+            from database_manager import DatabaseManager
+            _services['db_manager'] = DatabaseManager()
+        return _services['db_manager']
+
+def get_encoder():
+    """Return the shared EnhancedEncoder (imports OpenCV and the dlib models on first use)"""
+    with _services_lock:
+        if 'encoder' not in _services:
+            from enhanced_encoder import EnhancedEncoder
+            _services['encoder'] = EnhancedEncoder(db_manager=get_db_manager())
+        return _services['encoder']
+
+def get_face_system():
+    """Return the shared FaceRecognitionSystem, loading the gallery on first use"""
+    with _services_lock:
+        if 'face_system' not in _services:
+            from run_face_recognition import FaceRecognitionSystem
+            _services['face_system'] = FaceRecognitionSystem(db_manager=get_db_manager(), encoder=get_encoder())
+        return _services['face_system']
+
+def warm_up():
+    """Create every service, e.g. on a background thread while the GUI starts"""
+    get_face_system()
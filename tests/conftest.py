@@ -0,0 +1,18 @@
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import face_recognition  # noqa: F401
+except ImportError:
+    # dlib is heavy to install; tests that touch face_recognition patch the functions they use
+    placeholder = types.ModuleType("face_recognition")
+
+    def _unavailable(*args, **kwargs):
+        raise RuntimeError("face_recognition is not installed")
+
+    for name in ("face_locations", "face_encodings", "face_landmarks", "face_distance"):
+        setattr(placeholder, name, _unavailable)
+    sys.modules["face_recognition"] = placeholder
@@ -0,0 +1,104 @@
+import threading
+import pytest
+from access_log_writer import AccessLogWriter
+from database_manager import DatabaseManager
+
+@pytest.fixture
+def db_path(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    DatabaseManager(db_path)  # Creates the schema
+    return db_path
+
+def _logged_users(db_path):
+    return [row[0] for row in DatabaseManager(db_path)._connection().execute(
+        "SELECT user_id FROM access_logs ORDER BY id").fetchall()]
+
+def _idle_writer(db_path, **options):
+    # Nothing is written before close(): the batch never fills and the interval never passes
+    return AccessLogWriter(db_path, batch_size=1000, flush_interval=60, **options)
+
+def test_close_flushes_pending_events(db_path):
+    writer = _idle_writer(db_path)
+    for i in range(5):
+        assert writer.log(f"u{i}", True)
+    assert writer.stats()['pending'] == 5
+
+    writer.close()
+
+    assert _logged_users(db_path) == [f"u{i}" for i in range(5)]
+    assert writer.stats() == {'queued': 5, 'written': 5, 'dropped': 0, 'failed': 0, 'pending': 0}
+    assert not writer.log("late", True)
+    assert writer.stats()['dropped'] == 1
+
+def test_flush_writes_without_closing(db_path):
+    writer = AccessLogWriter(db_path, flush_interval=0.01)
+    writer.log("u0", True)
+    assert writer.flush(timeout=5)
+    assert _logged_users(db_path) == ["u0"]
+    writer.close()
+
+def test_drop_oldest(db_path):
+    writer = _idle_writer(db_path, max_queue=3, overflow='drop_oldest')
+    for i in range(5):
+        assert writer.log(f"u{i}", True)
+    writer.close()
+    assert _logged_users(db_path) == ["u2", "u3", "u4"]
+    assert writer.stats()['dropped'] == 2
+
+def test_drop_newest(db_path):
+    writer = _idle_writer(db_path, max_queue=3, overflow='drop_newest')
+    results = [writer.log(f"u{i}", True) for i in range(5)]
+    writer.close()
+    assert results == [True, True, True, False, False]
+    assert _logged_users(db_path) == ["u0", "u1", "u2"]
+
+def test_block_waits_for_room(db_path):
+    writer = AccessLogWriter(db_path, max_queue=2, batch_size=2, flush_interval=60, overflow='block')
+    producer = threading.Thread(target=lambda: [writer.log(f"u{i}", True) for i in range(20)])
+    producer.start()
+    producer.join(timeout=10)
+    assert not producer.is_alive()
+    writer.close()
+    assert _logged_users(db_path) == [f"u{i}" for i in range(20)]
+    assert writer.stats()['dropped'] == 0
+
+def test_granted_access_updates_last_access(db_path):
+    DatabaseManager(db_path).add_user("alice", "Alice")
+    writer = _idle_writer(db_path)
+    writer.log("alice", True, access_time="2026-01-01 10:00:00", visit_end="2026-01-01 10:05:00")
+    writer.log("alice", False, access_time="2026-01-01 11:00:00")
+    writer.close()
+    assert DatabaseManager(db_path).get_user("alice")[-1] == "2026-01-01 10:05:00"
+
+def test_rejects_unknown_policy(db_path):
+    with pytest.raises(ValueError):
+        AccessLogWriter(db_path, overflow='drop_everything')
+
+def test_visit_end_without_its_start_logs_the_whole_visit(db_path):
+    writer = _idle_writer(db_path, max_queue=2, overflow='drop_oldest')
+    writer.log("alice", True, access_time="2026-01-01 10:00:00", visit_id="v1")
+    writer.log("bob", True, access_time="2026-01-01 10:00:01", visit_id="v2")
+    # Evicts alice's start event
+    writer.end_visit("v1", "2026-01-01 10:03:00", 0.9, 12, "alice", True, access_time="2026-01-01 10:00:00")
+    writer.close()
+
+    rows = DatabaseManager(db_path)._connection().execute(
+        "SELECT user_id, access_time, visit_end, sightings FROM access_logs ORDER BY user_id").fetchall()
+    assert rows == [("alice", "2026-01-01 10:00:00", "2026-01-01 10:03:00", 12),
+                    ("bob", "2026-01-01 10:00:01", None, 1)]
+
+def test_blocked_producer_is_refused_when_writer_closes(db_path):
+    writer = _idle_writer(db_path, max_queue=1, overflow='block')
+    writer.log("u0", True)
+    results = []
+    producer = threading.Thread(target=lambda: results.append(writer.log("u1", True)))
+    producer.start()
+    producer.join(timeout=0.2)
+    assert producer.is_alive()  # Waiting for room
+
+    writer.close()
+    producer.join(timeout=5)
+
+    assert results == [False]
+    assert _logged_users(db_path) == ["u0"]
+    assert writer.stats()['dropped'] == 1
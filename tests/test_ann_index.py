@@ -0,0 +1,73 @@
+import numpy as np
+from ann_index import IVFIndex
+from gallery import Gallery
+
+def _clustered(count, clusters=50, seed=0):
+    """Face-like data: tight clusters around random centres"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, 128)).astype(np.float32)
+    rows = centres[rng.integers(clusters, size=count)] + 0.05 * rng.normal(size=(count, 128))
+    return rows.astype(np.float32)
+
+def _exact_top(matrix, queries, k):
+    distances = np.linalg.norm(queries[:, None, :] - matrix[None, :, :], axis=2)
+    return np.argsort(distances, axis=1)[:, :k], np.sort(distances, axis=1)[:, :k]
+
+def test_recall_on_clustered_data():
+    matrix = _clustered(5000)
+    queries = matrix[:100] + 0.01
+    index = IVFIndex(matrix, n_probe=8)
+
+    indices, _ = index.search(queries, k=10)
+
+    expected, _ = _exact_top(matrix, queries, 10)
+    recall = np.mean([len(set(found) & set(truth)) / 10 for found, truth in zip(indices, expected)])
+    assert recall >= 0.95
+
+def test_distances_are_exact_and_sorted():
+    matrix = _clustered(2000)
+    queries = matrix[:20] + 0.01
+    indices, distances = IVFIndex(matrix, n_probe=4).search(queries, k=5)
+
+    found = indices >= 0
+    exact = np.linalg.norm(queries[:, None, :] - matrix[np.where(found, indices, 0)], axis=2)
+    np.testing.assert_allclose(distances[found], exact[found], rtol=1e-3, atol=1e-3)
+    assert np.all(np.diff(distances, axis=1) >= 0)
+
+def test_probing_every_cell_is_brute_force():
+    matrix = _clustered(1000)
+    queries = _clustered(10, seed=1)
+    index = IVFIndex(matrix, n_lists=16)
+
+    indices, distances = index.search(queries, k=7, n_probe=16)
+
+    expected, expected_distances = _exact_top(matrix, queries, 7)
+    np.testing.assert_array_equal(indices, expected)
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-3, atol=1e-3)
+
+def test_pads_when_probed_cells_have_too_few_rows():
+    # Two far apart groups of 3 rows: one probed cell cannot fill k=5
+    rng = np.random.default_rng(0)
+    matrix = np.concatenate([rng.normal(0, 0.01, (3, 128)), rng.normal(10, 0.01, (3, 128))]).astype(np.float32)
+    index = IVFIndex(matrix, n_lists=2, n_probe=1)
+
+    indices, distances = index.search(matrix[:1], k=5)
+
+    assert sorted(indices[0, :3]) == [0, 1, 2]
+    np.testing.assert_array_equal(indices[0, 3:], [-1, -1])
+    assert np.all(np.isinf(distances[0, 3:]))
+
+def test_gallery_switches_to_ann_and_drops_padding():
+    matrix = _clustered(3000)
+    gallery = Gallery(matrix, [f"u{i}" for i in range(3000)], exact_search_limit=1000)
+
+    matches = gallery.match(matrix[:5] + 0.01, k=3)
+
+    assert gallery._ann is not None
+    assert [candidates[0][0] for candidates in matches] == [f"u{i}" for i in range(5)]
+    assert all(user_id is not None for candidates in matches for user_id, _ in candidates)
+
+    # Changing the gallery invalidates the index
+    gallery.remove('u0')
+    assert gallery._ann is None
+    assert gallery.match(matrix[:1] + 0.01)[0][0][0] != 'u0'
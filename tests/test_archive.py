@@ -0,0 +1,41 @@
+import csv
+import gzip
+import os
+from database_manager import DatabaseManager
+
+def _read_archive(path):
+    with gzip.open(path, 'rt', newline='') as file:
+        rows = list(csv.reader(file))
+    return rows[1:]
+
+def test_archives_in_the_same_second_do_not_overwrite(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "test.db"))
+    db_manager.archive_dir = str(tmp_path / "archive")
+    db_manager.log_access('a', True, access_time='2020-01-01 10:00:00')
+
+    first_count, first_path = db_manager.archive_access_logs(older_than_days=0)
+    db_manager.log_access('b', False, access_time='2020-01-01 11:00:00')
+    db_manager.log_access('c', True, access_time='2020-01-01 12:00:00')
+    second_count, second_path = db_manager.archive_access_logs(older_than_days=0)
+
+    assert (first_count, second_count) == (1, 2)
+    assert first_path != second_path
+    assert os.path.exists(first_path) and os.path.exists(second_path)
+
+    # Every deleted row is in exactly one archive
+    archived = [row[1] for row in _read_archive(first_path) + _read_archive(second_path)]
+    assert sorted(archived) == ['a', 'b', 'c']
+    assert db_manager.get_access_logs_page() == []
+
+def test_only_rows_past_retention_are_archived(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "test.db"))
+    db_manager.archive_dir = str(tmp_path / "archive")
+    db_manager.log_access('old', True, access_time='2000-01-01 10:00:00')
+    db_manager.log_access('new', True)
+
+    count, path = db_manager.archive_access_logs(older_than_days=90, batch_size=1)
+
+    assert count == 1
+    assert [row[1] for row in _read_archive(path)] == ['old']
+    assert [row[1] for row in db_manager.get_access_logs_page()] == ['new']
+    assert db_manager.archive_access_logs(older_than_days=90) == (0, None)
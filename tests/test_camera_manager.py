@@ -0,0 +1,111 @@
+import time
+import numpy as np
+import pytest
+import camera_manager
+from camera_manager import CameraManager
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture: numbered frames every delay seconds, frames of them if given"""
+
+    opened = []
+
+    def __init__(self, source, frames=None, can_open=True, delay=0.005):
+        self.source = source
+        self.delay = delay
+        self.remaining = frames
+        self.can_open = can_open
+        self.released = False
+        self.count = 0
+        FakeCapture.opened.append(self)
+
+    def isOpened(self):
+        return self.can_open
+
+    def read(self):
+        time.sleep(self.delay)
+        if self.remaining is not None:
+            if self.remaining == 0:
+                return False, None
+            self.remaining -= 1
+        self.count += 1
+        return True, np.full((4, 4, 3), self.count % 256, dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+@pytest.fixture
+def fake_capture(monkeypatch):
+    FakeCapture.opened = []
+    options = {}
+    monkeypatch.setattr(camera_manager.cv2, "VideoCapture", lambda source: FakeCapture(source, **options))
+    return options
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_subscribers_share_one_read_only_frame(fake_capture):
+    camera = CameraManager("fake", release_after=10)
+    first, second = camera.subscribe(), camera.subscribe()
+
+    assert _wait_for(lambda: len(first.frames) and len(second.frames))
+    frame, captured_at = first.get(timeout=1)
+    assert not frame.flags.writeable
+    assert len(FakeCapture.opened) == 1
+    camera.close()
+    assert FakeCapture.opened[0].released
+
+def test_frames_are_fanned_out_without_copying(fake_capture):
+    fake_capture.update(frames=1, delay=0.1)  # Time for both to subscribe before the only frame
+    camera = CameraManager("fake")
+    first, second = camera.subscribe(), camera.subscribe()
+
+    assert first.failed.wait(timeout=2) and second.failed.is_set()
+    assert first.get()[0] is second.get()[0]
+
+def test_device_released_after_idle_period(fake_capture):
+    camera = CameraManager("fake", release_after=0.2)
+    subscription = camera.subscribe()
+    assert subscription.get(timeout=1) is not None
+
+    subscription.close()
+    # Still open right after the last subscriber left
+    time.sleep(0.05)
+    assert not FakeCapture.opened[0].released
+
+    assert _wait_for(lambda: FakeCapture.opened[0].released)
+    assert camera._thread is None
+
+    # The next subscriber opens the device again
+    assert camera.subscribe().get(timeout=1) is not None
+    assert len(FakeCapture.opened) == 2
+    camera.close()
+
+def test_resubscribing_within_idle_period_reuses_device(fake_capture):
+    camera = CameraManager("fake", release_after=5)
+    camera.subscribe().close()
+    subscription = camera.subscribe()
+    assert subscription.get(timeout=1) is not None
+    assert len(FakeCapture.opened) == 1
+    camera.close()
+
+def test_source_failure_is_signalled(fake_capture):
+    fake_capture['frames'] = 2
+    camera = CameraManager("fake")
+    subscription = camera.subscribe(maxsize=5)
+
+    assert subscription.failed.wait(timeout=2)
+    assert len(subscription.frames) == 2
+    assert FakeCapture.opened[0].released
+
+def test_subscribe_returns_none_when_source_cannot_open(fake_capture):
+    fake_capture['can_open'] = False
+    camera = CameraManager("fake")
+    assert camera.subscribe() is None
+    assert FakeCapture.opened[0].released
+
+def test_get_camera_is_shared_per_source(fake_capture):
+    assert camera_manager.get_camera("a") is camera_manager.get_camera("a")
+    assert camera_manager.get_camera("a") is not camera_manager.get_camera("b")
@@ -0,0 +1,78 @@
+import os
+import pickle
+import cv2
+import numpy as np
+import pytest
+import enhanced_encoder
+from database_manager import DatabaseManager
+from enhanced_encoder import EnhancedEncoder
+from face_quality import FaceQualityGate
+
+@pytest.fixture
+def encoder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(enhanced_encoder.face_recognition, "face_locations",
+                        lambda img: [(10, 90, 90, 10)])
+    monkeypatch.setattr(enhanced_encoder.face_recognition, "face_encodings",
+                        lambda img, boxes: [np.full(128, 0.5, dtype=np.float32)])
+
+    encoder = EnhancedEncoder(workers=1, db_manager=DatabaseManager(str(tmp_path / "test.db")))
+    encoder.quality_gate = FaceQualityGate(min_face_size=None, min_brightness=None, max_brightness=None,
+                                           min_sharpness=None, max_yaw=None)
+    return encoder
+
+@pytest.fixture
+def photo(tmp_path):
+    path = str(tmp_path / "photo.jpg")
+    cv2.imwrite(path, np.full((100, 100, 3), 128, dtype=np.uint8))
+    return path
+
+def test_add_new_person_writes_only_that_entry(encoder, photo, monkeypatch):
+    existing = np.arange(2 * 128, dtype=np.float32).reshape(2, 128)
+    encoder.save_store({'alice': existing[0], 'bob': existing[1]}, {'alice': 'a-hash', 'bob': 'b-hash'})
+    monkeypatch.setattr(encoder, "generate_encoded_images",
+                        lambda *args, **kwargs: pytest.fail("enrollment must not re-encode everyone"))
+
+    ok, message = encoder.add_new_person(photo, 'carol', "Carol")
+
+    assert ok, message
+    store, hashes = encoder.load_store()
+    assert sorted(store) == ['alice', 'bob', 'carol']
+    np.testing.assert_array_equal(store['alice'], existing[0])
+    np.testing.assert_array_equal(store['bob'], existing[1])
+    np.testing.assert_array_equal(store['carol'], np.full(128, 0.5, dtype=np.float32))
+    assert hashes['alice'] == 'a-hash' and hashes['bob'] == 'b-hash'
+    assert hashes['carol'] == encoder.file_hash(os.path.join(encoder.modes_folder, 'carol.jpg'))
+    assert encoder.db_manager.get_user('carol') is not None
+
+def test_add_new_person_duplicate_keeps_existing_image(encoder, photo):
+    assert encoder.add_new_person(photo, 'carol', "Carol")[0]
+    saved = os.path.join(encoder.modes_folder, 'carol.jpg')
+    before = encoder.file_hash(saved)
+
+    ok, message = encoder.add_new_person(photo, 'carol', "Someone Else")
+
+    assert not ok and message == "User ID already exists"
+    assert encoder.file_hash(saved) == before
+
+def test_add_new_person_failure_removes_image_and_user(encoder, photo, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(encoder, "add_encoding", fail)
+
+    ok, message = encoder.add_new_person(photo, 'carol', "Carol")
+
+    assert not ok and "disk full" in message
+    assert not os.path.exists(os.path.join(encoder.modes_folder, 'carol.jpg'))
+    assert encoder.db_manager.get_user('carol') is None
+
+def test_unconvertible_legacy_pickle_is_regenerated(encoder, photo, monkeypatch):
+    with open(encoder.legacy_encodings_file, 'wb') as file:
+        pickle.dump([[np.zeros(128)], ['alice', 'bob']], file)
+    assert encoder.load_gallery_file() is None
+    assert os.path.exists(encoder.legacy_encodings_file)
+
+    os.makedirs(encoder.modes_folder)
+    os.replace(photo, os.path.join(encoder.modes_folder, 'alice.jpg'))
+    assert encoder.generate_encoded_images()
+    assert encoder.load_gallery_file().ids == ['alice']
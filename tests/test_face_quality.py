@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+import face_quality
+from face_quality import FaceQualityGate
+
+BOX = (20, 180, 180, 20)  # 160 px face
+
+def _textured(level=128, size=200):
+    """Mid-grey image with a sharp checkerboard, RGB"""
+    yy, xx = np.mgrid[:size, :size]
+    checker = ((yy // 4 + xx // 4) % 2) * 60 - 30
+    return np.clip(level + checker, 0, 255).astype(np.uint8)[..., None].repeat(3, axis=2)
+
+def _landmarks(nose_x):
+    return [{'left_eye': [(70, 80), (80, 80)], 'right_eye': [(120, 80), (130, 80)], 'nose_tip': [(nose_x, 110)]}]
+
+@pytest.fixture
+def frontal(monkeypatch):
+    monkeypatch.setattr(face_quality.face_recognition, "face_landmarks",
+                        lambda image, boxes, model="large": _landmarks(100))
+
+def test_good_face_passes(frontal):
+    passed, scores, reason = FaceQualityGate().score(_textured(), BOX)
+    assert passed and reason is None
+    assert scores['size'] == 160
+    assert scores['yaw'] == pytest.approx(0.0)
+
+def test_small_face_is_rejected_before_anything_else(monkeypatch):
+    monkeypatch.setattr(face_quality.face_recognition, "face_landmarks",
+                        lambda *args, **kwargs: pytest.fail("landmarks computed for a tiny face"))
+    passed, scores, reason = FaceQualityGate(min_face_size=40).score(_textured(), (10, 40, 40, 10))
+    assert not passed and reason.startswith("face too small")
+    assert 'brightness' not in scores
+
+@pytest.mark.parametrize('level, expected', [(15, "too dark"), (240, "too bright")])
+def test_brightness_limits(frontal, level, expected):
+    image = np.full((200, 200, 3), level, dtype=np.uint8)
+    passed, _, reason = FaceQualityGate().score(image, BOX)
+    assert not passed and reason.startswith(expected)
+
+def test_blurry_face_is_rejected(frontal):
+    image = np.full((200, 200, 3), 128, dtype=np.uint8)
+    passed, scores, reason = FaceQualityGate().score(image, BOX)
+    assert not passed and reason.startswith("too blurry")
+    assert scores['sharpness'] < 30
+
+def test_turned_face_is_rejected(monkeypatch):
+    # Nose 30 px off the eye midpoint with 50 px between the eyes: yaw 0.6
+    monkeypatch.setattr(face_quality.face_recognition, "face_landmarks",
+                        lambda image, boxes, model="large": _landmarks(130))
+    passed, scores, reason = FaceQualityGate(max_yaw=0.45).score(_textured(), BOX)
+    assert not passed and reason.startswith("face turned away")
+    assert scores['yaw'] == pytest.approx(0.6)
+    assert FaceQualityGate(max_yaw=None).score(_textured(), BOX)[0]
+
+def test_disabled_thresholds_are_not_checked():
+    gate = FaceQualityGate(min_face_size=None, min_brightness=None, max_brightness=None,
+                           min_sharpness=None, max_yaw=None)
+    assert gate.score(np.zeros((200, 200, 3), dtype=np.uint8), BOX)[0]
+
+def test_stats_count_skips_per_reason(frontal):
+    gate = FaceQualityGate()
+    gate.check(_textured(), BOX)
+    gate.check(np.full((200, 200, 3), 128, dtype=np.uint8), BOX)
+    gate.check(np.full((200, 200, 3), 10, dtype=np.uint8), BOX)
+    gate.check(_textured(), (10, 20, 20, 10))
+
+    assert gate.stats() == {
+        'checked': 4,
+        'skipped': 3,
+        'skip_rate': 0.75,
+        'reasons': {'too blurry': 1, 'too dark': 1, 'face too small': 1},
+    }
+    assert FaceQualityGate().stats()['skip_rate'] == 0.0
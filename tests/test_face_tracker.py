@@ -0,0 +1,73 @@
+import pytest
+from face_tracker import FaceTracker, box_iou
+
+def _box(left, top, size=100):
+    """(top, right, bottom, left) box"""
+    return (top, left + size, top + size, left)
+
+def test_box_iou():
+    assert box_iou(_box(0, 0), _box(0, 0)) == 1.0
+    assert box_iou(_box(0, 0), _box(200, 0)) == 0.0
+    # Half overlap: 5000 / (10000 + 10000 - 5000)
+    assert box_iou(_box(0, 0), _box(50, 0)) == pytest.approx(1 / 3)
+
+def test_moving_face_keeps_its_track():
+    tracker = FaceTracker()
+    first, = tracker.update([_box(0, 0)])
+    second, = tracker.update([_box(10, 5)])
+    assert second is first
+    assert second.box == _box(10, 5)
+
+def test_each_box_takes_its_best_overlapping_track():
+    tracker = FaceTracker()
+    left, right = tracker.update([_box(0, 0), _box(300, 0)])
+    # Same faces, reported in the other order and slightly moved
+    tracks = tracker.update([_box(310, 0), _box(5, 0)])
+    assert tracks == [right, left]
+
+def test_low_overlap_starts_a_new_track():
+    tracker = FaceTracker(iou_threshold=0.3)
+    first, = tracker.update([_box(0, 0)])
+    second, = tracker.update([_box(60, 0)])  # IoU 0.25
+    assert second is not first
+    assert second.track_id != first.track_id
+
+def test_track_expires_after_max_missed_frames():
+    tracker = FaceTracker(max_missed=2)
+    track, = tracker.update([_box(0, 0)])
+    tracker.update([])
+    tracker.update([])
+    assert tracker.tracks == [track] and track.missed == 2
+
+    # Seen again within max_missed: same track, counter reset
+    assert tracker.update([_box(0, 0)]) == [track]
+    assert track.missed == 0
+
+    for _ in range(3):
+        tracker.update([])
+    assert tracker.tracks == []
+    assert tracker.update([_box(0, 0)])[0] is not track
+
+def test_reverify_cadence():
+    tracker = FaceTracker(reverify_interval=1.0)
+    track, = tracker.update([_box(0, 0)])
+    assert tracker.needs_verification(track, now=100.0)
+
+    track.identify("u1", 0.3, now=100.0)
+    assert track.confidence == pytest.approx(0.7)
+    assert not tracker.needs_verification(track, now=100.5)
+    assert tracker.needs_verification(track, now=101.0)
+
+    # The identity is carried forward while the face is tracked
+    track, = tracker.update([_box(5, 5)])
+    assert track.user_id == "u1"
+
+def test_reset_forces_identification_again():
+    tracker = FaceTracker()
+    track, = tracker.update([_box(0, 0)])
+    track.identify("u1", 0.3, now=100.0)
+    tracker.reset()
+    new, = tracker.update([_box(0, 0)])
+    assert new is not track
+    assert new.user_id is None
+    assert tracker.needs_verification(new, now=100.1)
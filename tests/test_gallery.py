@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from gallery import Gallery
+
+def _random(count, seed=0):
+    return np.random.default_rng(seed).random((count, 128), dtype=np.float32)
+
+def _brute_force(matrix, queries):
+    return np.linalg.norm(queries[:, None, :] - matrix[None, :, :], axis=2)
+
+def test_distances_match_brute_force():
+    matrix, queries = _random(50), _random(4, seed=1)
+    gallery = Gallery(matrix, [f"u{i}" for i in range(50)])
+    np.testing.assert_allclose(gallery.distances(queries), _brute_force(matrix, queries), rtol=1e-4, atol=1e-4)
+
+@pytest.mark.parametrize('k', [1, 5, 50, 80])
+def test_search_top_k_sorted(k):
+    matrix, queries = _random(50), _random(3, seed=1)
+    gallery = Gallery(matrix, [f"u{i}" for i in range(50)])
+
+    indices, distances = gallery.search(queries, k)
+
+    expected = np.argsort(_brute_force(matrix, queries), axis=1)[:, :min(k, 50)]
+    assert indices.shape == distances.shape == (3, min(k, 50))
+    np.testing.assert_array_equal(indices, expected)
+    assert np.all(np.diff(distances, axis=1) >= 0)
+
+def test_match_returns_ids():
+    matrix = _random(10)
+    gallery = Gallery(matrix, [f"u{i}" for i in range(10)])
+    matches = gallery.match([matrix[3], matrix[7]], k=2)
+    assert [candidates[0][0] for candidates in matches] == ['u3', 'u7']
+    assert matches[0][0][1] == pytest.approx(0.0, abs=1e-3)
+    assert gallery.match([]) == []
+
+def test_empty_gallery():
+    gallery = Gallery()
+    indices, distances = gallery.search(_random(2), k=3)
+    assert indices.shape == distances.shape == (2, 0)
+    assert gallery.match(_random(2)) == [[], []]
+
+def test_add_grows_and_replaces():
+    gallery = Gallery()
+    matrix = _random(40)
+    for i, row in enumerate(matrix):
+        gallery.add(f"u{i}", row)
+    assert len(gallery) == 40
+    np.testing.assert_array_equal(gallery.encodings, matrix)
+
+    gallery.add('u5', matrix[0])
+    assert len(gallery) == 40
+    assert {user_id for user_id, _ in gallery.match([matrix[0]], k=2)[0]} == {'u0', 'u5'}
+
+@pytest.mark.parametrize('writeable', [False, True])
+def test_add_and_remove_never_write_to_the_loaded_matrix(writeable):
+    matrix = _random(5)
+    original = matrix.copy()
+    matrix.flags.writeable = writeable  # Read-only like a memory-mapped gallery file
+    gallery = Gallery(matrix, list("abcde"))
+
+    gallery.add('a', np.ones(128))
+    gallery.remove('b')
+    gallery.add('f', np.zeros(128))
+
+    np.testing.assert_array_equal(matrix, original)
+    assert len(gallery) == 5
+    assert gallery.match([np.ones(128)])[0][0][0] == 'a'
+
+def test_remove_swaps_last_row_into_hole():
+    matrix = _random(5)
+    gallery = Gallery(matrix, list("abcde"))
+
+    assert gallery.remove('b')
+    assert not gallery.remove('b')
+    assert 'b' not in gallery and len(gallery) == 4
+    assert gallery.ids == list("aecd")
+    np.testing.assert_array_equal(gallery.encodings, matrix[[0, 4, 2, 3]])
+    # Every remaining id still finds its own encoding, norms moved with the rows
+    for i, user_id in zip((0, 2, 3, 4), "acde"):
+        assert gallery.match([matrix[i]])[0][0][0] == user_id
+
+    assert gallery.remove('d')  # The last row
+    assert gallery.ids == list("aec")
+    gallery.add('f', matrix[1])
+    assert gallery.match([matrix[1]])[0][0][0] == 'f'
+
+def test_load_rejects_mismatched_ids():
+    with pytest.raises(ValueError):
+        Gallery(_random(3), ['a', 'b'])
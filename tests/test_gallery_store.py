@@ -0,0 +1,51 @@
+import pickle
+import numpy as np
+import pytest
+import gallery_store
+from gallery_store import write_gallery, open_gallery, read_created_at, convert_pickle
+
+def test_write_and_open_round_trip(tmp_path):
+    path = str(tmp_path / "test.gallery")
+    matrix = np.random.default_rng(0).random((5, 128), dtype=np.float32)
+    write_gallery(path, matrix, ['a', 'b', 'c', 'd', 'e'])
+
+    gallery = open_gallery(path)
+    assert gallery.ids == ['a', 'b', 'c', 'd', 'e']
+    np.testing.assert_array_equal(gallery.encodings, matrix)
+    assert not gallery.encodings.flags.writeable
+    assert read_created_at(path) == gallery.created_at
+
+def test_open_missing_gallery(tmp_path):
+    assert open_gallery(str(tmp_path / "missing.gallery")) is None
+    assert read_created_at(str(tmp_path / "missing.gallery")) is None
+
+def test_replace_while_open_without_mmap(tmp_path, monkeypatch):
+    monkeypatch.setattr(gallery_store, "USE_MMAP", False)
+    path = str(tmp_path / "test.gallery")
+    write_gallery(path, np.zeros((2, 128)), ['a', 'b'])
+    old = open_gallery(path)
+
+    write_gallery(path, np.ones((3, 128)), ['a', 'b', 'c'])
+
+    # The open generation keeps its own copy, the file has the new one
+    assert old.ids == ['a', 'b'] and not old.encodings.any()
+    assert open_gallery(path).ids == ['a', 'b', 'c']
+
+def test_convert_pickle(tmp_path):
+    pickle_path = str(tmp_path / "EncodedImages.p")
+    with open(pickle_path, 'wb') as file:
+        pickle.dump([[np.full(128, 0.25), np.full(128, 0.75)], ['a', 'b']], file)
+
+    assert convert_pickle(pickle_path, str(tmp_path / "out.gallery")) == 2
+    gallery = open_gallery(str(tmp_path / "out.gallery"))
+    assert gallery.ids == ['a', 'b']
+    assert gallery.encodings[1, 0] == pytest.approx(0.75)
+
+def test_convert_pickle_with_ids_without_encoding(tmp_path):
+    pickle_path = str(tmp_path / "EncodedImages.p")
+    with open(pickle_path, 'wb') as file:
+        pickle.dump([[np.zeros(128)], ['a', 'no_face']], file)
+
+    with pytest.raises(ValueError, match="regenerate"):
+        convert_pickle(pickle_path, str(tmp_path / "out.gallery"))
+    assert open_gallery(str(tmp_path / "out.gallery")) is None
@@ -0,0 +1,130 @@
+import threading
+import time
+import numpy as np
+from gallery_store import write_gallery, open_gallery
+from live_gallery import LiveGallery
+
+class FileEncoder:
+    """The part of EnhancedEncoder that LiveGallery uses"""
+
+    def __init__(self, path, load_delay=0.0):
+        self.encodings_file = path
+        self.load_delay = load_delay
+        self.loading = threading.Event()
+
+    def load_gallery_file(self, quiet=False):
+        self.loading.set()
+        time.sleep(self.load_delay)
+        return open_gallery(self.encodings_file)
+
+def _write_generation(path, generation):
+    """generation + 1 rows, every value and id prefix equal to the generation"""
+    count = generation + 1
+    write_gallery(path, np.full((count, 128), generation), [f"{generation}-{i}" for i in range(count)])
+
+def _assert_consistent(snapshot):
+    gallery = snapshot.gallery
+    generations = {user_id.split('-')[0] for user_id in gallery.ids}
+    assert len(generations) == 1
+    generation = int(generations.pop())
+    assert len(gallery) == generation + 1
+    assert (gallery.encodings == generation).all()
+
+def test_reload_swaps_in_a_new_snapshot(tmp_path):
+    path = str(tmp_path / "test.gallery")
+    _write_generation(path, 1)
+    swapped = []
+    live = LiveGallery(FileEncoder(path), on_swap=swapped.append)
+    assert live.version == 0 and len(live.current.gallery) == 0
+
+    assert live.reload(force=True, quiet=True)
+    assert live.version == 1
+    assert swapped == [live.current]
+    _assert_consistent(live.current)
+    assert live.current.created_at == open_gallery(path).created_at
+
+    # Same file header: nothing to rebuild unless forced
+    assert not live.reload(quiet=True)
+    assert live.version == 1
+
+def test_reload_without_file_keeps_current(tmp_path):
+    live = LiveGallery(FileEncoder(str(tmp_path / "missing.gallery")))
+    before = live.current
+    assert not live.reload(force=True, quiet=True)
+    assert live.current is before
+
+def test_rebuild_publishes_atomically(tmp_path):
+    path = str(tmp_path / "test.gallery")
+    _write_generation(path, 1)
+    encoder = FileEncoder(path)
+    live = LiveGallery(encoder)
+    live.reload(force=True, quiet=True)
+    old = live.current
+
+    _write_generation(path, 2)
+    encoder.load_delay = 0.2
+    encoder.loading.clear()
+    live.reload_async(force=True)
+
+    # While the new generation is built the old snapshot stays fully in use
+    assert encoder.loading.wait(2)
+    assert live.current is old
+    _assert_consistent(old)
+
+    deadline = time.time() + 2
+    while live.current is old and time.time() < deadline:
+        time.sleep(0.01)
+    assert live.version == 2
+    _assert_consistent(live.current)
+    # The old snapshot is untouched for readers that still hold it
+    assert old.gallery.ids == ["1-0", "1-1"]
+
+def test_readers_never_see_a_half_built_snapshot(tmp_path):
+    path = str(tmp_path / "test.gallery")
+    _write_generation(path, 0)
+    live = LiveGallery(FileEncoder(path))
+    live.reload(force=True, quiet=True)
+
+    done = threading.Event()
+    errors = []
+
+    def reader():
+        last_version = 0
+        while not done.is_set():
+            snapshot = live.current
+            try:
+                _assert_consistent(snapshot)
+                assert snapshot.version >= last_version
+            except AssertionError as e:
+                errors.append(e)
+                return
+            last_version = snapshot.version
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in readers:
+        thread.start()
+    for generation in range(1, 30):
+        _write_generation(path, generation)
+        live.reload(force=True, quiet=True)
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    assert live.version == 30
+
+def test_watcher_reloads_when_the_file_changes(tmp_path):
+    path = str(tmp_path / "test.gallery")
+    _write_generation(path, 1)
+    live = LiveGallery(FileEncoder(path), check_interval=0.05)
+    live.reload(force=True, quiet=True)
+    live.start_watching()
+    try:
+        _write_generation(path, 3)
+        deadline = time.time() + 2
+        while live.version == 1 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        live.stop_watching()
+    assert live.version == 2
+    assert len(live.current.gallery) == 4
@@ -0,0 +1,59 @@
+import builtins
+import sys
+import time
+from metrics import Metrics, MetricsExporter, process_memory_bytes
+
+def test_stage_percentiles_and_prometheus():
+    m = Metrics(window=100)
+    for ms in range(1, 101):
+        m.observe('match', ms / 1000)
+    m.incr('frames_analyzed', 3)
+    m.set_gauge('gallery_size', lambda: 42)
+
+    snapshot = m.snapshot()
+    assert snapshot['stages']['match']['count'] == 100
+    assert 49 <= snapshot['stages']['match']['p50_ms'] <= 51
+    assert snapshot['counters'] == {'frames_analyzed': 3}
+    assert snapshot['gauges']['gallery_size'] == 42
+
+    text = m.to_prometheus()
+    assert 'face_stage_seconds_count{stage="match"} 100' in text
+    assert 'face_frames_analyzed_total 3' in text
+
+def test_memory_unavailable(monkeypatch):
+    real_open = builtins.open
+
+    def no_proc(path, *args, **kwargs):
+        if str(path).startswith("/proc"):
+            raise FileNotFoundError(path)
+        return real_open(path, *args, **kwargs)
+
+    # Neither /proc nor the resource module, as on Windows
+    monkeypatch.setattr(builtins, "open", no_proc)
+    monkeypatch.setitem(sys.modules, "resource", None)
+    assert process_memory_bytes() is None
+
+    m = Metrics()
+    assert 'memory_bytes' not in m.snapshot()['gauges']
+    assert 'face_memory_bytes' not in m.to_prometheus()
+
+def test_exporter_survives_failed_writes(tmp_path, monkeypatch):
+    m = Metrics()
+    exporter = MetricsExporter(m, path=str(tmp_path / "metrics.prom"), interval=0.01)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return "face_up 1\n"
+
+    monkeypatch.setattr(m, "to_prometheus", flaky)
+    exporter.start()
+    deadline = time.time() + 5
+    while len(calls) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    exporter.stop()
+
+    assert len(calls) >= 3
+    assert (tmp_path / "metrics.prom").read_text() == "face_up 1\n"
@@ -0,0 +1,56 @@
+import numpy as np
+from motion_gate import MotionGate
+
+def _frame(block_at=None):
+    """Dark BGR frame, optionally with a bright 80x80 block at (x, y)"""
+    frame = np.full((240, 320, 3), 40, dtype=np.uint8)
+    if block_at is not None:
+        x, y = block_at
+        frame[y:y + 80, x:x + 80] = 220
+    return frame
+
+def test_static_scene_goes_idle():
+    gate = MotionGate(idle_after=2.0, refresh_interval=None)
+    frame = _frame(block_at=(20, 20))
+    assert gate.check(frame, now=0.0)       # First frame always passes
+    assert gate.check(frame, now=1.0)       # Not idle_after seconds yet
+    assert not gate.check(frame, now=2.0)
+    assert not gate.check(frame.copy(), now=2.1)
+    assert gate.stats()['mode'] == 'idle'
+
+def test_moved_block_passes_within_one_frame():
+    gate = MotionGate(idle_after=2.0, refresh_interval=None)
+    gate.check(_frame(block_at=(20, 20)), now=0.0)
+    assert not gate.check(_frame(block_at=(20, 20)), now=3.0)
+    assert gate.check(_frame(block_at=(200, 120)), now=3.1)
+    assert gate.stats()['mode'] == 'active'
+
+def test_keep_active_holds_the_gate_open():
+    gate = MotionGate(idle_after=2.0, refresh_interval=None)
+    frame = _frame()
+    gate.check(frame, now=0.0)
+    assert gate.check(frame, keep_active=True, now=5.0)
+    assert gate.check(frame, now=6.0)       # Counted from the last keep_active
+    assert not gate.check(frame, now=7.0)
+
+def test_refresh_interval_fires_while_idle():
+    gate = MotionGate(idle_after=2.0, idle_poll_interval=0.5, refresh_interval=5.0)
+    frame = _frame()
+    gate.check(frame, now=0.0)
+    passed = [gate.check(frame, now=2.0 + 0.5 * i) for i in range(25)]
+
+    # Idle from t=2, one frame let through at t=7 and t=12, still idle after
+    assert [2.0 + 0.5 * i for i, ok in enumerate(passed) if ok] == [7.0, 12.0]
+    assert gate.idle
+    assert gate.stats()['refreshes'] == 2
+
+def test_time_and_checks_counted_per_mode():
+    gate = MotionGate(idle_after=2.0, refresh_interval=None)
+    frame = _frame()
+    for now in (0.0, 1.0, 2.0, 3.0, 4.0):
+        gate.check(frame, now=now)
+    stats = gate.stats()
+    assert stats['active_time'] == 2.0
+    assert stats['idle_time'] == 2.0
+    assert stats['active_checks'] == 2
+    assert stats['idle_checks'] == 3
@@ -0,0 +1,48 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+import pytest
+from recognition_service import RecognitionService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the real service loop with workers that only wait to be told to stop
+SERVICE_SCRIPT = textwrap.dedent('''
+    import signal
+    import recognition_service
+
+    def idle_worker(source, detector, stop_request, stats_queue, stats_interval):
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        stop_request.wait()
+
+    recognition_service.run_worker = idle_worker
+    service = recognition_service.RecognitionService(["door", "lobby"])
+    print("started", flush=True)
+    service.run()
+    print("stopped", [state["process"].exitcode for state in service.workers.values()], flush=True)
+''')
+
+def test_sigterm_stops_service_and_workers(tmp_path):
+    script = tmp_path / "service.py"
+    script.write_text(SERVICE_SCRIPT)
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    process = subprocess.Popen([sys.executable, str(script)], stdout=subprocess.PIPE, text=True, env=env)
+    try:
+        assert process.stdout.readline().strip() == "started"
+        time.sleep(1.5)  # Well inside the stop_request.wait() loop
+
+        process.send_signal(signal.SIGTERM)
+        output, _ = process.communicate(timeout=15)
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+    assert process.returncode == 0
+    assert output.strip() == "stopped [0, 0]"
+
+def test_duplicate_sources_are_rejected():
+    with pytest.raises(ValueError, match="door"):
+        RecognitionService(["door", "lobby", "door"])
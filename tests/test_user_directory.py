@@ -0,0 +1,28 @@
+from database_manager import DatabaseManager
+
+def test_reloads_on_user_changes_only(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    db_manager = DatabaseManager(db_path)
+    db_manager.add_user('alice', "Alice")
+    directory = db_manager.get_user_directory()
+    directory.check_interval = 0
+    assert directory.get('alice') == ("Alice", 'active')
+
+    loads = []
+    original_load = directory.load
+    directory.load = lambda: loads.append(1) or original_load()
+
+    # Access logging touches users.last_access but not who the users are
+    other = DatabaseManager(db_path)
+    other.log_access('alice', True)
+    assert not directory.refresh_if_changed()
+    assert loads == []
+
+    # Another process adding or disabling a user is picked up
+    conn = other._connection()
+    conn.execute("INSERT INTO users (user_id, name) VALUES ('bob', 'Bob')")
+    conn.execute("UPDATE users SET status = 'inactive' WHERE user_id = 'alice'")
+    conn.commit()
+    assert directory.refresh_if_changed()
+    assert directory.get('bob') == ("Bob", 'active')
+    assert directory.get('alice') == ("Alice", 'inactive')
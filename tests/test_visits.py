@@ -0,0 +1,64 @@
+import pytest
+from database_manager import DatabaseManager
+from visit_engine import VisitEngine
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "test.db"))
+    db_manager.add_user('alice', "Alice")
+    yield db_manager
+    db_manager.stop_log_writer()
+
+def _rows(db_manager):
+    cursor = db_manager._connection().cursor()
+    cursor.execute("SELECT user_id, access_time, visit_end, confidence, sightings FROM access_logs ORDER BY id")
+    return cursor.fetchall()
+
+def test_sightings_collapse_into_visits_per_key():
+    visits = VisitEngine(visit_gap=5.0, max_visit=600.0)
+    visit, started = visits.observe('alice', 'alice', True, 0.7, now=100.0)
+    assert started
+    assert visits.observe('alice', 'alice', True, 0.9, now=102.0) == (visit, False)
+    assert visits.observe('unknown:3', 'unknown', False, None, now=102.0)[1]
+
+    assert visits.expire(now=106.0) == []
+    closed = visits.expire(now=107.5)
+    assert [v.key for v in closed] == ['alice', 'unknown:3']
+    assert visit.sightings == 2 and visit.best_confidence == 0.9
+    assert visit.visit_id != closed[1].visit_id
+
+def test_long_visit_is_split():
+    visits = VisitEngine(visit_gap=5.0, max_visit=10.0)
+    for now in range(0, 12):
+        visits.observe('alice', 'alice', True, 0.8, now=float(now))
+    assert len(visits.expire(now=11.0)) == 1
+    assert visits.observe('alice', 'alice', True, 0.8, now=12.0)[1]
+
+@pytest.mark.parametrize('writer', [False, True])
+def test_visit_row_is_written_at_start_and_completed_at_end(db_manager, writer):
+    if writer:
+        db_manager.start_log_writer(flush_interval=0.01)
+
+    db_manager.log_access('alice', True, access_time='2026-01-01 10:00:00', visit_end='2026-01-01 10:00:00',
+                          confidence=0.7, sightings=1, visit_id='v1')
+    if writer:
+        db_manager.log_writer.flush(timeout=5)
+    # Already on disk while the visit is open, so a crash cannot lose it
+    assert _rows(db_manager) == [('alice', '2026-01-01 10:00:00', '2026-01-01 10:00:00', 0.7, 1)]
+
+    db_manager.end_visit('v1', '2026-01-01 10:02:00', 0.9, 40, 'alice', True)
+    if writer:
+        db_manager.log_writer.flush(timeout=5)
+    assert _rows(db_manager) == [('alice', '2026-01-01 10:00:00', '2026-01-01 10:02:00', 0.9, 40)]
+    assert db_manager.get_user('alice')[-1] == '2026-01-01 10:02:00'
+
+def test_unknown_visit_has_no_confidence(db_manager):
+    db_manager.start_log_writer(flush_interval=0.01)
+    db_manager.log_access('unknown', False, confidence=None, visit_id='v2')
+    db_manager.end_visit('v2', '2026-01-01 10:00:05', None, 3, 'unknown', False)
+    db_manager.stop_log_writer()
+    assert [row[3:] for row in _rows(db_manager)] == [(None, 3)]
+
+def test_end_visit_without_a_start_row_logs_the_visit(db_manager):
+    db_manager.end_visit('v3', '2026-01-01 10:02:00', 0.8, 5, 'alice', True, access_time='2026-01-01 10:00:00')
+    assert _rows(db_manager) == [('alice', '2026-01-01 10:00:00', '2026-01-01 10:02:00', 0.8, 5)]
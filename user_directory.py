@@ -0,0 +1,69 @@
+import threading
+import time
+from db_connections import connect
+
+class UserDirectory:
+    """In-memory copy of the name and status of every enrolled user.
+
+    Loaded once, then kept current by the DatabaseManager that owns it
+    (add_user, update_user and delete_user update it directly) and by
+    polling the users_version row, which triggers bump on every change to
+    a user's id, name or status, at most once every check_interval
+    seconds. Access logging (last_access updates) does not bump it.
+    """
+
+    def __init__(self, db_path, check_interval=1.0):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self._users = {}
+        self._lock = threading.Lock()
+        self._last_check = 0
+        self._users_version = None
+
+        self._conn = connect(db_path, check_same_thread=False)
+        self.load()
+
+    def _read_users_version(self):
+        return self._conn.execute("SELECT version FROM users_version WHERE id = 1").fetchone()[0]
+
+    def load(self):
+        """(Re)load every user from the database"""
+        with self._lock:
+            # Version first: a change committed in between is picked up by the next check
+            self._users_version = self._read_users_version()
+            rows = self._conn.execute("SELECT user_id, name, status FROM users").fetchall()
+            self._users = {user_id: (name, status) for user_id, name, status in rows}
+            self._last_check = time.time()
+
+    def refresh_if_changed(self):
+        """Reload if the users changed since the last check"""
+        now = time.time()
+        if now - self._last_check < self.check_interval:
+            return False
+
+        with self._lock:
+            self._last_check = now
+            changed = self._read_users_version() != self._users_version
+        if changed:
+            self.load()
+        return changed
+
+    def get(self, user_id):
+        """Return (name, status) for user_id, or None if it is not enrolled"""
+        return self._users.get(user_id)
+
+    def put(self, user_id, name=None, status=None):
+        """Add a user or update some of its fields"""
+        with self._lock:
+            current_name, current_status = self._users.get(user_id, (None, 'active'))
+            self._users[user_id] = (name or current_name, status or current_status)
+
+    def remove(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def __len__(self):
+        return len(self._users)
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,68 @@
+import time
+import uuid
+
+class Visit:
+    """Continuous sightings of one identity (or one unknown face track)"""
+
+    def __init__(self, key, user_id, access_granted, confidence, now):
+        self.key = key
+        self.visit_id = uuid.uuid4().hex  # Ties the row logged at the start to its end
+        self.user_id = user_id
+        self.access_granted = access_granted
+        self.start = now
+        self.end = now
+        self.best_confidence = confidence
+        self.sightings = 1
+
+    def update(self, confidence, now):
+        self.end = now
+        self.sightings += 1
+        if confidence is not None and (self.best_confidence is None or confidence > self.best_confidence):
+            self.best_confidence = confidence
+
+class VisitEngine:
+    """Collapses per-frame sightings into one visit event per identity.
+
+    Sightings are keyed per identity (user_id) for known faces and per
+    track for unknown ones, so several people at the door each get their
+    own visit. A visit ends once its key has not been seen for visit_gap
+    seconds, or is split after max_visit seconds of continuous presence.
+    """
+
+    def __init__(self, visit_gap=5.0, max_visit=600.0):
+        self.visit_gap = visit_gap
+        self.max_visit = max_visit
+        self.open_visits = {}
+        self.sightings = 0
+        self.visits_closed = 0
+
+    def observe(self, key, user_id, access_granted, confidence=None, now=None):
+        """Record one sighting, returns (visit, True if it just started)"""
+        now = now if now is not None else time.time()
+        self.sightings += 1
+
+        visit = self.open_visits.get(key)
+        if visit is not None:
+            visit.update(confidence, now)
+            return visit, False
+
+        visit = Visit(key, user_id, access_granted, confidence, now)
+        self.open_visits[key] = visit
+        return visit, True
+
+    def expire(self, now=None):
+        """Close and return the visits that ended (quiet for visit_gap or too long)"""
+        now = now if now is not None else time.time()
+        closed = [visit for visit in self.open_visits.values()
+                  if now - visit.end >= self.visit_gap or visit.end - visit.start >= self.max_visit]
+        for visit in closed:
+            del self.open_visits[visit.key]
+        self.visits_closed += len(closed)
+        return closed
+
+    def close_all(self):
+        """Close and return every open visit, e.g. when the camera stops"""
+        closed = list(self.open_visits.values())
+        self.open_visits = {}
+        self.visits_closed += len(closed)
+        return closed